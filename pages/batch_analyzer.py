@@ -0,0 +1,117 @@
+import streamlit as st
+import uuid
+from datetime import datetime
+from utils.openai_client import OpenAIClientError, get_openai_client
+from utils.pdf_processor import PDFProcessor
+from utils.scheduler import set_session
+from utils.cache import get_extraction_cache
+from utils.batch import BatchAnalyzer, rank_results, results_to_csv
+
+st.set_page_config(page_title="Batch Analysis", page_icon="📚", layout="wide")
+
+st.title("📚 Batch Resume Analysis")
+st.markdown("Score many resumes against **one job description** and rank the candidates")
+
+# Initialize services - the AI client is shared across reruns and sessions
+try:
+    openai_client = get_openai_client(on_warning=st.warning)
+except OpenAIClientError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+# Queue this session's API requests fairly against other sessions
+set_session(st.session_state.setdefault('request_session', uuid.uuid4().hex))
+pdf_processor = PDFProcessor()
+batch_analyzer = BatchAnalyzer(openai_client, pdf_processor, extraction_cache=get_extraction_cache())
+
+def results_table(results):
+    """Ranked rows for display"""
+    return [
+        {
+            'Rank': rank,
+            'Resume': result['file_name'],
+            'ATS Score': result['score'],
+            'Local Score': result.get('local_score'),
+            'Status': result['status'],
+            'Error': result['error'] or ''
+        }
+        for rank, result in enumerate(rank_results(results), 1)
+    ]
+
+with st.sidebar:
+    st.header("📝 Input Details")
+
+    job_desc = st.text_area(
+        "Paste Job Description*",
+        height=200,
+        placeholder="Copy and paste the complete job description here...",
+        help="Every resume is scored against this job description"
+    )
+
+    resume_files = st.file_uploader(
+        "Upload Resumes (PDF)*",
+        type=['pdf'],
+        accept_multiple_files=True,
+        help="Upload any number of PDF resumes (max 10MB each)"
+    )
+
+    if resume_files:
+        st.info(f"📄 {len(resume_files)} resumes selected")
+
+    prescreen_threshold = st.slider(
+        "Local pre-screen threshold",
+        0, 100, batch_analyzer.prescreen_threshold,
+        help="Resumes whose instant local score is below this are not sent to the AI (0 sends all)"
+    )
+
+start_btn = st.button("🚀 Score All Resumes", use_container_width=True, disabled=not (job_desc and resume_files))
+
+if start_btn and job_desc.strip() and resume_files:
+    progress_bar = st.progress(0, text="Starting batch analysis...")
+    table_placeholder = st.empty()
+
+    batch_analyzer.prescreen_threshold = prescreen_threshold
+    results = []
+    for result in batch_analyzer.run(job_desc, resume_files):
+        results.append(result)
+        progress_bar.progress(
+            len(results) / len(resume_files),
+            text=f"Analyzed {len(results)}/{len(resume_files)}: {result['file_name']}"
+        )
+        # Show partial, already-ranked results as they finish
+        table_placeholder.dataframe(results_table(results), use_container_width=True, hide_index=True)
+
+    progress_bar.progress(1.0, text="✅ Batch analysis complete")
+    st.session_state.batch_results = results
+
+if st.session_state.get('batch_results'):
+    results = st.session_state.batch_results
+    if not start_btn:
+        st.dataframe(results_table(results), use_container_width=True, hide_index=True)
+
+    scored = [result for result in results if result['score'] is not None]
+    screened_out = [result for result in results if result['status'] == 'screened_out']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Resumes Analyzed", len(results))
+    with col2:
+        st.metric("Average ATS Score", f"{sum(r['score'] for r in scored) / len(scored):.1f}/100" if scored else "N/A")
+    with col3:
+        st.metric("Screened Out Locally", len(screened_out))
+    with col4:
+        st.metric("Failed", len(results) - len(scored) - len(screened_out))
+
+    st.download_button(
+        "💾 Download Ranking (CSV)",
+        data=results_to_csv(results),
+        file_name=f"batch_ranking_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+        mime="text/csv"
+    )
+elif not resume_files:
+    st.markdown("---")
+    st.markdown("""
+    ### 🎯 How to Use:
+    1. **Paste the job description** you are hiring for
+    2. **Upload all candidate resumes** as PDFs
+    3. **Score all resumes** and watch the ranking fill in as results arrive
+    4. **Download the ranking** as CSV
+    """)
@@ -1,14 +1,22 @@
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
+from utils.analytics import Analytics
+from utils.charts import cached_figure, max_chart_points
+from utils.lazy import lazy_import
+
+# Charts are skipped entirely when there is no history yet
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
 
 st.set_page_config(page_title="Career Insights", page_icon="📈", layout="wide")
 
 st.title("📈 Career Insights & Analytics")
 st.markdown("Track your progress and get personalized career recommendations")
 
-if not st.session_state.analysis_history:
+analytics = Analytics()
+stats = analytics.get_real_stats()
+
+if not stats['total_analyses']:
     st.info("📊 Start by analyzing some resumes to see your insights here!")
     st.stop()
 
@@ -18,31 +26,31 @@ st.subheader("📊 Overall Performance")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    avg_score = sum([r.get('score', 0) for r in st.session_state.analysis_history]) / len(st.session_state.analysis_history)
-    st.metric("Average ATS Score", f"{avg_score:.1f}/100")
+    st.metric("Average ATS Score", f"{stats['avg_score']:.1f}/100")
 
 with col2:
-    best_score = max([r.get('score', 0) for r in st.session_state.analysis_history])
-    st.metric("Best Score", f"{best_score}/100")
+    st.metric("Best Score", f"{stats['best_score']}/100")
 
 with col3:
-    analyses_count = len(st.session_state.analysis_history)
-    st.metric("Total Analyses", analyses_count)
+    st.metric("Total Analyses", stats['total_analyses'])
 
 with col4:
-    improvement = "↑ 15%" if len(st.session_state.analysis_history) > 1 else "N/A"
+    trend = stats['improvement_trend']
+    improvement = f"{'↑' if trend >= 0 else '↓'} {abs(trend):.0f}%" if stats['total_analyses'] > 1 else "N/A"
     st.metric("Trend", improvement)
 
 # Score trend chart
 st.subheader("📈 Score Trend Over Time")
 
-if len(st.session_state.analysis_history) > 1:
-    dates = [r['timestamp'] for r in st.session_state.analysis_history]
-    scores = [r.get('score', 0) for r in st.session_state.analysis_history]
-    
+# Cached, pre-sorted columns; rebuilt only when a record is added
+frame = analytics.get_frame()
+
+def build_trend_figure():
+    # Downsampled when the history is long
+    points = frame.sample_indices(max_chart_points())
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=dates, y=scores,
+        x=frame.dates[points], y=frame.scores[points],
         mode='lines+markers',
         name='ATS Score',
         line=dict(color='#3498db', width=3),
@@ -55,11 +63,35 @@ if len(st.session_state.analysis_history) > 1:
         yaxis_title="ATS Score",
         template="plotly_white"
     )
-    
+    return fig
+
+def build_histogram_figure():
+    counts, edges = frame.score_histogram()
+    fig = go.Figure(go.Bar(
+        x=[f"{int(low)}-{int(high)}" for low, high in zip(edges[:-1], edges[1:])],
+        y=counts,
+        marker_color='#3498db'
+    ))
+    fig.update_layout(
+        xaxis_title="ATS Score",
+        yaxis_title="Analyses",
+        template="plotly_white"
+    )
+    return fig
+
+if len(frame) > 1:
+    fig = cached_figure(('insights_trend', analytics.user_id), frame.version, build_trend_figure)
     st.plotly_chart(fig, use_container_width=True)
 else:
     st.info("Analyze more resumes to see your trend chart!")
 
+# Score distribution
+st.subheader("📊 Score Distribution")
+
+fig_hist = cached_figure(('insights_histogram', analytics.user_id), frame.version, build_histogram_figure)
+
+st.plotly_chart(fig_hist, use_container_width=True)
+
 # Common issues analysis
 st.subheader("🔍 Common Improvement Areas")
 
@@ -70,12 +102,13 @@ issues = {
     'Skill Mismatch': 10
 }
 
-fig_pie = px.pie(
+# Static data, so one figure serves every user
+fig_pie = cached_figure(('insights_issues',), 0, lambda: px.pie(
     values=list(issues.values()),
     names=list(issues.keys()),
     title="Common Resume Issues",
     color_discrete_sequence=px.colors.qualitative.Set3
-)
+))
 
 st.plotly_chart(fig_pie, use_container_width=True)
 
@@ -96,23 +129,23 @@ for rec in recommendations:
 # Recent activity
 st.subheader("📋 Recent Analyses")
 
-for analysis in list(reversed(st.session_state.analysis_history))[:5]:
+for analysis in analytics.get_history(limit=5):
     with st.container():
         col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
         
         with col1:
-            st.write(f"**{analysis.get('job_title', 'Unknown Position')}**")
+            st.write(f"**{analysis.job_title or 'Unknown Position'}**")
         
         with col2:
-            score = analysis.get('score', 0)
+            score = analysis.score
             color = "#2ecc71" if score >= 70 else "#f39c12" if score >= 50 else "#e74c3c"
             st.markdown(f"<span style='color: {color}; font-weight: bold;'>{score}/100</span>", 
                       unsafe_allow_html=True)
         
         with col3:
-            st.write(analysis.get('type', 'ATS').replace('_', ' ').title())
+            st.write(analysis.type.replace('_', ' ').title())
         
         with col4:
-            st.write(analysis['timestamp'].strftime("%m/%d/%Y"))
+            st.write(analysis.timestamp.strftime("%m/%d/%Y"))
         
         st.markdown("---")
\ No newline at end of file
@@ -1,10 +1,11 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-import random
+from utils.analytics import Analytics
+from utils.charts import cached_figure, max_chart_points
+from utils.lazy import lazy_import
+
+# Only needed once there is enough history to chart
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(
     page_title="Dashboard - HireLens",
@@ -65,29 +66,11 @@ st.markdown("""
 class Dashboard:
     def __init__(self):
         self._initialize_session_state()
+        self.analytics = Analytics()
+        self.stats = self.analytics.get_real_stats()
     
     def _initialize_session_state(self):
-        """Initialize session state with realistic data"""
-        if 'analysis_history' not in st.session_state:
-            # Generate realistic analysis history
-            job_titles = [
-                "Senior Data Scientist", "Machine Learning Engineer", 
-                "Data Analyst", "Software Engineer", "Product Manager",
-                "Frontend Developer", "Backend Developer", "Full Stack Developer"
-            ]
-            
-            st.session_state.analysis_history = []
-            for i in range(5):
-                days_ago = random.randint(1, 30)
-                score = random.randint(65, 92)
-                st.session_state.analysis_history.append({
-                    'timestamp': datetime.now() - timedelta(days=days_ago),
-                    'job_title': random.choice(job_titles),
-                    'score': score,
-                    'type': 'ats_score',
-                    'details': f'Analysis completed with score {score}'
-                })
-        
+        """Initialize the user profile; history lives in the persistent store"""
         if 'user_profile' not in st.session_state:
             st.session_state.user_profile = {
                 'name': 'Alex Johnson',
@@ -95,15 +78,6 @@ class Dashboard:
                 'experience_level': 'Mid Level',
                 'industry': 'Technology'
             }
-        
-        # Initialize real stats
-        if 'real_stats' not in st.session_state:
-            st.session_state.real_stats = {
-                'total_analyses': len(st.session_state.analysis_history),
-                'avg_score': self._calculate_average_score(),
-                'improvement_rate': random.randint(5, 25),
-                'success_rate': random.randint(65, 85)
-            }
 
     def show_header(self):
         """Show dashboard header with personalized greeting"""
@@ -122,7 +96,8 @@ class Dashboard:
         """Display key performance metrics with real data"""
         st.subheader("📊 Your Performance Overview")
         
-        stats = st.session_state.real_stats
+        stats = self.stats
+        this_week = self.analytics.count_since(datetime.now() - timedelta(days=7))
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -130,14 +105,14 @@ class Dashboard:
             st.metric(
                 "Total Analyses", 
                 stats['total_analyses'],
-                delta=f"+{random.randint(1, 5)} this week"
+                delta=f"+{this_week} this week"
             )
         
         with col2:
             st.metric(
                 "Average ATS Score", 
-                f"{stats['avg_score']}/100",
-                delta=f"+{stats['improvement_rate']}% vs last month"
+                f"{self._calculate_average_score()}/100",
+                delta=f"{stats['improvement_trend']:+.0f}% since first analyses"
             )
         
         with col3:
@@ -151,7 +126,7 @@ class Dashboard:
         with col4:
             st.metric(
                 "Success Rate", 
-                f"{stats['success_rate']}%",
+                f"{stats['success_rate']:.0f}%",
                 "Industry Average: 72%" if stats['success_rate'] > 72 else "Below Average"
             )
 
@@ -181,72 +156,74 @@ class Dashboard:
         """Show ATS score trend chart with real data"""
         st.subheader("📈 Your ATS Score Trend")
         
-        if len(st.session_state.analysis_history) > 1:
-            # Prepare real data for chart
-            history_df = self._prepare_trend_data()
-            
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(
-                x=history_df['date'],
-                y=history_df['score'],
-                mode='lines+markers',
-                name='ATS Score',
-                line=dict(color='#3498db', width=4),
-                marker=dict(size=8, color='#2980b9')
-            ))
-            
-            # Add trend line
-            if len(history_df) > 2:
-                try:
-                    z = np.polyfit(range(len(history_df)), history_df['score'], 1)
-                    p = np.poly1d(z)
-                    fig.add_trace(go.Scatter(
-                        x=history_df['date'],
-                        y=p(range(len(history_df))),
-                        mode='lines',
-                        name='Trend',
-                        line=dict(color='#e74c3c', width=2, dash='dash')
-                    ))
-                except Exception as e:
-                    st.warning(f"Could not calculate trend: {e}")
-            
-            fig.update_layout(
-                height=300,
-                template='plotly_white',
-                showlegend=True,
-                xaxis_title="Date",
-                yaxis_title="ATS Score",
-                yaxis=dict(range=[0, 100])
+        # Cached, pre-sorted columns; rebuilt only when a record is added
+        frame = self.analytics.get_frame()
+        if len(frame) > 1:
+            fig = cached_figure(
+                ('dashboard_trend', self.analytics.user_id),
+                frame.version,
+                lambda: self._build_trend_figure(frame)
             )
-            
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("📊 Analyze more resumes to see your score trend!")
 
+    def _build_trend_figure(self, frame):
+        """Build the trend chart, downsampled when the history is long"""
+        points = frame.sample_indices(max_chart_points())
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=frame.dates[points],
+            y=frame.scores[points],
+            mode='lines+markers',
+            name='ATS Score',
+            line=dict(color='#3498db', width=4),
+            marker=dict(size=8, color='#2980b9')
+        ))
+        
+        # Add trend line
+        if len(frame) > 2:
+            try:
+                fig.add_trace(go.Scatter(
+                    x=frame.dates[points],
+                    y=frame.trend_line()[points],
+                    mode='lines',
+                    name='Trend',
+                    line=dict(color='#e74c3c', width=2, dash='dash')
+                ))
+            except Exception as e:
+                st.warning(f"Could not calculate trend: {e}")
+        
+        fig.update_layout(
+            height=300,
+            template='plotly_white',
+            showlegend=True,
+            xaxis_title="Date",
+            yaxis_title="ATS Score",
+            yaxis=dict(range=[0, 100])
+        )
+        return fig
+
     def show_recent_activity(self):
         """Show recent analysis activity with real data"""
         st.subheader("📋 Recent Activity")
         
         # Get last 3 analyses
-        recent_activities = sorted(
-            st.session_state.analysis_history, 
-            key=lambda x: x['timestamp'], 
-            reverse=True
-        )[:3]
+        recent_activities = self.analytics.get_history(limit=3)
         
         if recent_activities:
             for activity in recent_activities:
-                score = activity.get('score', 0)
+                score = activity.score
                 score_color = "#2ecc71" if score >= 80 else "#f39c12" if score >= 70 else "#e74c3c"
                 
                 st.markdown(f"""
                 <div class="recent-activity-item">
                     <div style="display: flex; justify-content: space-between; align-items: center;">
                         <div style="flex: 1;">
-                            <strong>{activity.get('job_title', 'Unknown Position')}</strong>
+                            <strong>{activity.job_title or 'Unknown Position'}</strong>
                             <br>
-                            <small style="color: #666;">{activity['timestamp'].strftime('%b %d, %Y')}</small>
+                            <small style="color: #666;">{activity.timestamp.strftime('%b %d, %Y')}</small>
                         </div>
                         <div style="font-size: 1.2em; font-weight: bold; color: {score_color};">
                             {score}/100
@@ -296,7 +273,7 @@ class Dashboard:
         """Show goal progress tracking with real progress"""
         st.subheader("🎯 Goal Progress")
         
-        current_analyses = len(st.session_state.analysis_history)
+        current_analyses = self.stats['total_analyses']
         current_avg = self._calculate_average_score()
         
         col1, col2 = st.columns(2)
@@ -335,31 +312,15 @@ class Dashboard:
 
     def _calculate_average_score(self):
         """Calculate average ATS score from real data"""
-        if not st.session_state.analysis_history:
+        if not self.stats['total_analyses']:
             return 72  # Default average
-        scores = [record.get('score', 0) for record in st.session_state.analysis_history]
-        return round(sum(scores) / len(scores), 1)
+        return round(self.stats['avg_score'], 1)
 
     def _get_best_score(self):
         """Get the best ATS score from real data"""
-        if not st.session_state.analysis_history:
+        if not self.stats['total_analyses']:
             return 85  # Default best score
-        return max([record.get('score', 0) for record in st.session_state.analysis_history])
-
-    def _prepare_trend_data(self):
-        """Prepare real data for trend chart"""
-        data = []
-        for record in st.session_state.analysis_history:
-            data.append({
-                'date': record['timestamp'],
-                'score': record.get('score', 0),
-                'job_title': record.get('job_title', '')
-            })
-        
-        # Sort by date
-        df = pd.DataFrame(data)
-        df = df.sort_values('date')
-        return df
+        return self.stats['best_score']
 
     def run(self):
         """Run the dashboard with all components"""
@@ -1,58 +1,42 @@
 import streamlit as st
+import uuid
 from datetime import datetime
-from utils.openai_client import OpenAIClient
+from utils.openai_client import OpenAIClientError, get_openai_client
 from utils.pdf_processor import PDFProcessor
+from utils.scheduler import set_session
 from utils.analytics import Analytics
-import re
+from utils.cache import get_extraction_cache
+from utils.ats_engine import LocalATSScorer
+from utils.scoring import extract_job_title, watch_overall_score
 
 st.set_page_config(page_title="Resume Analysis", page_icon="📊", layout="wide")
 
 st.title("📊 AI Resume Analysis")
 st.markdown("**Real OpenAI-powered analysis** of your resume against job descriptions")
 
-# Initialize services - 🆕 CHANGED HERE
-openai_client = OpenAIClient()  # 🆕 CHANGED HERE
-pdf_processor = PDFProcessor()
+# Initialize services - the AI client is shared across reruns and sessions
+try:
+    openai_client = get_openai_client(on_warning=st.warning)
+except OpenAIClientError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+# Queue this session's API requests fairly against other sessions
+set_session(st.session_state.setdefault('request_session', uuid.uuid4().hex))
+pdf_processor = PDFProcessor(on_warning=st.warning, on_error=st.error)
 analytics = Analytics()
+extraction_cache = get_extraction_cache()
+local_scorer = LocalATSScorer()
 
-def extract_score_from_result(result):
-    """Extract numerical score from AI response"""
-    try:
-        patterns = [
-            r'Overall Score:\s*(\d{1,3})/100',
-            r'Score:\s*(\d{1,3})/100',
-            r'(\d{1,3})/100',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, result, re.IGNORECASE)
-            if match:
-                score = int(match.group(1))
-                return max(0, min(100, score))
-        
-        # Estimate from content
-        if any(word in result.lower() for word in ['excellent', 'outstanding', 'perfect']):
-            return 85
-        elif any(word in result.lower() for word in ['good', 'strong', 'solid']):
-            return 75
-        elif any(word in result.lower() for word in ['average', 'fair', 'adequate']):
-            return 65
-        elif any(word in result.lower() for word in ['poor', 'weak', 'terrible', 'bad']):
-            return 45
-        else:
-            return 70
-            
-    except:
-        return 70
-
-def extract_job_title(job_description):
-    """Extract job title from job description"""
-    lines = job_description.split('\n')
-    for line in lines[:5]:
-        line = line.strip()
-        if line and len(line) < 100 and any(word in line.lower() for word in ['engineer', 'developer', 'analyst', 'manager', 'specialist']):
-            return line
-    return "Analyzed Position"
+def show_score_assessment(container, score):
+    """Show score with color coding"""
+    if score >= 80:
+        container.success(f"🎉 **Overall AI Assessment: STRONG MATCH** ({score}/100)")
+    elif score >= 70:
+        container.info(f"👍 **Overall AI Assessment: GOOD MATCH** ({score}/100)")
+    elif score >= 60:
+        container.warning(f"💪 **Overall AI Assessment: FAIR MATCH** ({score}/100)")
+    else:
+        container.error(f"🚨 **Overall AI Assessment: NEEDS IMPROVEMENT** ({score}/100)")
 
 with st.sidebar:
     st.header("📝 Input Details")
@@ -112,66 +96,97 @@ if job_desc and resume_file and (ats_btn or personality_btn or keywords_btn or o
         st.error("❌ Please enter a job description")
         st.stop()
     
-    # Process PDF
+    # Determine analysis type
+    if ats_btn:
+        analysis_type = "ats_score"
+    elif personality_btn:
+        analysis_type = "personality_analysis"
+    elif keywords_btn:
+        analysis_type = "missing_keywords"
+    else:
+        analysis_type = "resume_optimization"
+    fused = openai_client.uses_fused_analysis(analysis_type)
+    
+    # Process PDF: cached text is reused across analysis types, otherwise the
+    # text layer is read directly and pages are only sent to vision if needed.
+    # Fused analysis types send the page images with the analysis prompt instead.
+    resume_images = None
     with st.spinner("🔄 Processing your resume..."):
-        resume_images = pdf_processor.convert_pdf_to_images(resume_file)
+        progress_placeholder = st.empty()
+        resume_text = openai_client.extract_resume_text(
+            resume_file, pdf_processor, cache=extraction_cache, on_progress=progress_placeholder.caption,
+            use_vision=not fused
+        )
+        if not resume_text and fused:
+            progress_placeholder.caption("🖼️ Rendering pages for the AI...")
+            resume_images = pdf_processor.convert_pdf_to_images(resume_file)
+        progress_placeholder.empty()
     
-    if not resume_images:
+    if not resume_text and not resume_images:
         st.error("❌ Failed to process PDF. Please try another file.")
         st.stop()
     
-    # Determine analysis type
-    if ats_btn:
-        analysis_type = "ats_score"
+    # Show analysis type
+    if analysis_type == "ats_score":
         st.subheader("🤖 Real ATS Compatibility Analysis")
         st.info("🔍 AI is analyzing your resume content against the job description...")
-    elif personality_btn:
-        analysis_type = "personality_analysis"
+    elif analysis_type == "personality_analysis":
         st.subheader("👤 Professional Profile Analysis")
         st.info("🔍 AI is analyzing your resume style and content...")
-    elif keywords_btn:
-        analysis_type = "missing_keywords"
+    elif analysis_type == "missing_keywords":
         st.subheader("🔑 Missing Keywords Analysis")
         st.info("🔍 AI is comparing keywords between your resume and job description...")
     else:
-        analysis_type = "resume_optimization"
         st.subheader("💡 Resume Optimization Suggestions")
         st.info("🔍 AI is identifying improvement opportunities...")
     
-    # Perform REAL AI analysis - 🆕 CHANGED HERE
-    result = openai_client.analyze_resume(job_desc, resume_images, analysis_type)
+    # Instant, LLM-free estimate while the AI analysis is generated
+    if analysis_type == "ats_score" and resume_text:
+        local_result = local_scorer.score(job_desc, resume_text)
+        st.caption(
+            f"⚡ Instant local estimate: **{local_result['overall']}/100**"
+            + (f" · missing: {', '.join(local_result['missing_skills'][:8])}" if local_result['missing_skills'] else "")
+        )
     
-    if result and not result.startswith("❌"):
-        st.markdown("---")
-        st.markdown("### 📋 AI Analysis Results")
-        
-        # Show the actual AI response
-        st.markdown(result)
-        
-        # For ATS scores, extract and save to history
+    st.markdown("---")
+    st.markdown("### 📋 AI Analysis Results")
+    
+    # The score banner is filled in as soon as the "Overall Score" line
+    # streams in, well before the rest of the analysis has been generated
+    score_placeholder = st.empty()
+    on_score = None
+    if analysis_type == "ats_score":
+        on_score = lambda score: show_score_assessment(score_placeholder, score)
+    
+    # Stream the REAL AI analysis as it is generated; the output is kept in
+    # a placeholder so a failure after partial output can be cleared
+    output_placeholder = st.empty()
+    stream = openai_client.analyze_resume_stream(job_desc, resume_images, analysis_type, resume_text=resume_text)
+    result = output_placeholder.container().write_stream(watch_overall_score(stream, on_score))
+    
+    if stream.error or not result:
+        score_placeholder.empty()
+        output_placeholder.empty()
+        st.error(stream.error or "❌ Analysis failed. Please try again.")
+    
+    else:
+        # For ATS scores, save the validated score to history
         if analysis_type == "ats_score":
-            score = extract_score_from_result(result)
-            job_title = extract_job_title(job_desc)
-            
-            # Save to analytics
-            analytics.add_analysis_record(
-                job_title=job_title,
-                score=score,
-                analysis_type=analysis_type,
-                details=result[:300]
-            )
-            
-            # Show score with color coding
-            if score >= 80:
-                st.success(f"🎉 **Overall AI Assessment: STRONG MATCH** ({score}/100)")
-            elif score >= 70:
-                st.info(f"👍 **Overall AI Assessment: GOOD MATCH** ({score}/100)")
-            elif score >= 60:
-                st.warning(f"💪 **Overall AI Assessment: FAIR MATCH** ({score}/100)")
+            if stream.score is None:
+                st.warning("⚠️ The AI response had no overall score, so it was not saved to your dashboard.")
             else:
-                st.error(f"🚨 **Overall AI Assessment: NEEDS IMPROVEMENT** ({score}/100)")
-            
-            st.success("✅ Analysis saved to your dashboard!")
+                job_title = extract_job_title(job_desc)
+                
+                # Save to analytics
+                analytics.add_analysis_record(
+                    job_title=job_title,
+                    score=stream.score,
+                    analysis_type=analysis_type,
+                    details=result[:300]
+                )
+                
+                show_score_assessment(score_placeholder, stream.score)
+                st.success("✅ Analysis saved to your dashboard!")
         
         # Add download option
         st.download_button(
@@ -180,11 +195,6 @@ if job_desc and resume_file and (ats_btn or personality_btn or keywords_btn or o
             file_name=f"resume_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
             mime="text/plain"
         )
-        
-    else:
-        st.error("❌ Analysis failed. Please try again.")
-        if result:
-            st.error(result)
 
 else:
     # Show instructions
@@ -1,5 +1,7 @@
 import streamlit as st
 import os
+from utils.analytics import Analytics
+from utils.cache import get_response_cache
 
 st.set_page_config(page_title="Settings", page_icon="⚙️", layout="wide")
 
@@ -53,7 +55,7 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     if st.button("🗑️ Clear Analysis History"):
-        st.session_state.analysis_history = []
+        Analytics().clear_history()
         st.success("Analysis history cleared!")
 
 with col2:
@@ -67,7 +69,7 @@ with col3:
 # API status
 st.subheader("🔌 API Status")
 
-col1, col2, col3 = st.columns(3)
+col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     st.metric("Gemini API", "Connected", "✅")
@@ -78,6 +80,18 @@ with col2:
 with col3:
     st.metric("Storage", "Local", "⚡")
 
+with col4:
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        cache_stats = response_cache.stats()
+        st.metric(
+            "Response Cache",
+            f"{cache_stats['hit_rate']:.0f}% hits",
+            f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+        )
+    else:
+        st.metric("Response Cache", "Disabled")
+
 # About section
 st.subheader("ℹ️ About HireLens")
 
@@ -0,0 +1,47 @@
+from utils.ats_engine import CRITERIA, LocalATSScorer, tokenize
+
+JOB = """Senior Backend Engineer
+Requirements:
+- 5+ years building services in Python and JavaScript
+- Kafka, Redis and Terraform
+- Bachelor's degree in Computer Science
+"""
+
+
+def test_synonyms_fold_onto_one_skill():
+    assert tokenize("Node.js, nodejs and node js") == ["nodejs"] * 3
+    assert tokenize("JS / ES6 / ECMAScript") == ["javascript"] * 3
+    result = LocalATSScorer().score("Must know JavaScript and Python", "Built apps in JS and Python3")
+    assert result["matched_skills"] == ["javascript", "python"]
+    assert result["missing_skills"] == []
+
+
+def test_r_and_d_is_not_the_r_language():
+    assert "r_lang" not in tokenize("Led the R&D team; R. Smith, references")
+    result = LocalATSScorer().score("R programming for statistics", "Five years in R&D doing statistics")
+    assert result["missing_skills"] == ["r"]
+    assert "r" not in result["matched_skills"]
+
+
+def test_resume_years_count_overlapping_ranges_once():
+    years = LocalATSScorer._resume_years
+    assert years("Acme 2010 - 2016\nGlobex 2014 - 2018") == 8
+    # A range inside another adds nothing
+    assert years("Acme 2010 – 2020\nSide project 2012 to 2014\nInitech 2019 - 2021") == 11
+    assert years("Acme 2015 - 2017\nGlobex 2019 - 2020") == 3
+
+
+def test_each_criterion_stays_within_its_points():
+    scorer = LocalATSScorer()
+    resumes = [
+        "",
+        "Pastry chef. Croissants and sourdough since 2012.",
+        JOB * 5 + "Experience 2005 - present\nPhD in Computer Science\nSkills: Python, JavaScript, Kafka, Redis",
+    ]
+    maxima = dict(CRITERIA)
+    for resume in resumes:
+        result = scorer.score(JOB, resume)
+        assert set(result["breakdown"]) == set(maxima)
+        for name, points in result["breakdown"].items():
+            assert 0 <= points <= maxima[name], (name, points, resume[:20])
+        assert 0 <= result["overall"] <= 100
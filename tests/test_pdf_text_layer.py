@@ -0,0 +1,126 @@
+import io
+import zlib
+
+from utils.pdf_processor import PDFProcessor, _TextLayerParser
+
+HELVETICA = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+
+def _stream(content, compress=False, extra=b""):
+    if compress:
+        content = zlib.compress(content)
+        extra += b" /Filter /FlateDecode"
+    return b"<< /Length %d%s >>\nstream\n%s\nendstream" % (len(content), extra, content)
+
+
+def build_pdf(pages, font=HELVETICA, compress=False, extra_objects=None, object_stream=False):
+    """Assemble a minimal PDF with one content stream per page and font /F1
+
+    With ``object_stream`` the catalog, page tree, pages and font are stored
+    in a compressed object stream, as PDF 1.5 writers do.
+    """
+    page_numbers = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % n for n in page_numbers), len(pages)
+        ),
+        3: font,
+    }
+    for number, content in zip(page_numbers, pages):
+        objects[number] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (number + 1)
+        )
+        objects[number + 1] = _stream(content, compress)
+    objects.update(extra_objects or {})
+
+    if object_stream:
+        packed = [n for n in sorted(objects) if not objects[n].rstrip().endswith(b"endstream")]
+        offsets, body = [], b""
+        for n in packed:
+            offsets.append(b"%d %d" % (n, len(body)))
+            body += objects.pop(n) + b"\n"
+        header = b" ".join(offsets) + b"\n"
+        objects[max(page_numbers) + 100] = _stream(
+            header + body, compress=True,
+            extra=b" /Type /ObjStm /N %d /First %d" % (len(packed), len(header))
+        )
+
+    out = b"%PDF-1.5\n"
+    for number in sorted(objects):
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    return out + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+def extract(pdf):
+    return _TextLayerParser(pdf).extract_pages()
+
+
+def test_flate_compressed_content():
+    pdf = build_pdf([b"BT /F1 12 Tf 72 700 Td (Senior Data Engineer) Tj ET"], compress=True)
+    assert extract(pdf) == ["Senior Data Engineer"]
+
+
+def test_tj_kerning_joins_glyphs_and_wide_gaps_become_spaces():
+    pdf = build_pdf([b"BT /F1 12 Tf 72 700 Td [(Soft) -20 (ware) -1000 (Engineer)] TJ ET"])
+    assert extract(pdf) == ["Software Engineer"]
+
+
+def test_to_unicode_cmap_maps_two_byte_glyph_ids():
+    cmap = (
+        b"/CIDInit /ProcSet findresource begin begincmap\n"
+        b"1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+        b"2 beginbfchar <0001> <0050> <0002> <0079> endbfchar\n"
+        b"1 beginbfrange <0010> <0013> <0074> endbfrange\n"
+        b"endcmap end end"
+    )
+    font = (
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /Embedded /Encoding /Identity-H "
+        b"/DescendantFonts [<< /Type /Font /Subtype /CIDFontType2 /DW 500 >>] /ToUnicode 90 0 R >>"
+    )
+    # Glyph ids 1, 2 -> "Py"; 0x10-0x13 -> "tuvw" from the range
+    pdf = build_pdf(
+        [b"BT /F1 12 Tf 72 700 Td <0001000200100011> Tj ET"],
+        font=font,
+        extra_objects={90: _stream(cmap, compress=True)},
+    )
+    assert extract(pdf) == ["Pytu"]
+
+
+def test_two_column_layout_reads_left_column_first():
+    left = [b"Experience", b"Acme Corp 2019 to 2024", b"Built data pipelines", b"Led a team of four", b"Education"]
+    right = [b"Skills", b"Python", b"SQL and Spark", b"Kubernetes", b"Languages English"]
+    content = b"BT /F1 12 Tf"
+    for row, (left_text, right_text) in enumerate(zip(left, right)):
+        y = 700 - 20 * row
+        content += b" 1 0 0 1 50 %d Tm (%s) Tj 1 0 0 1 340 %d Tm (%s) Tj" % (y, left_text, y, right_text)
+    content += b" ET"
+
+    lines = extract(build_pdf([content]))[0].splitlines()
+    assert lines == [text.decode() for text in left + right]
+
+
+def test_objects_inside_compressed_object_streams():
+    pdf = build_pdf(
+        [b"BT /F1 12 Tf 72 700 Td (Page one) Tj ET", b"BT /F1 12 Tf 72 700 Td (Page two) Tj ET"],
+        compress=True,
+        object_stream=True,
+    )
+    assert b"/Type /Catalog" not in pdf
+    assert extract(pdf) == ["Page one", "Page two"]
+
+
+def test_processor_extract_text_marks_pages():
+    pdf = build_pdf([b"BT /F1 12 Tf 72 700 Td (First) Tj ET", b"BT ET", b"BT /F1 12 Tf 72 700 Td (Third) Tj ET"])
+    text = PDFProcessor().extract_text(io.BytesIO(pdf))
+    assert text == "\n\n--- Page 1 ---\nFirst\n\n--- Page 3 ---\nThird"
+
+
+def test_only_pages_without_a_usable_layer_are_rasterized():
+    body = b"BT /F1 12 Tf 72 700 Td (Data engineer building Spark pipelines) Tj ET"
+    processor = PDFProcessor()
+    page_texts = processor.extract_page_texts(io.BytesIO(build_pdf([body, b"BT ET", body])))
+    usable = processor.usable_text_pages(page_texts)
+    assert sorted(usable) == [1, 3]
+    assert processor.select_pages(len(page_texts), skip_pages=usable) == [2]
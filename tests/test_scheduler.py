@@ -0,0 +1,149 @@
+import threading
+import types
+
+import pytest
+
+from utils import scheduler
+from utils.scheduler import RequestScheduler, set_session
+
+
+class FakeClock:
+    """Stands in for the scheduler's ``time`` module; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def _queued(s, session):
+    with s._cond:
+        return len(s._queues.get(session, ()))
+
+
+def _wait_until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("timed out")
+
+
+def test_waiting_requests_are_admitted_round_robin_across_sessions(clock):
+    # One request per minute: after the first, each admission needs a minute
+    s = RequestScheduler(requests_per_minute=1)
+    s.call(lambda: None)
+
+    admitted = []
+    threads = []
+
+    def submit(session, name):
+        def run():
+            set_session(session)
+            s.call(lambda: admitted.append(name))
+        queued = _queued(s, session)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        threads.append(thread)
+        # Queue in a known order before the next request arrives
+        _wait_until(lambda: _queued(s, session) == queued + 1)
+
+    # A batch burst queues first, then an interactive user arrives
+    submit("batch", "b1")
+    submit("batch", "b2")
+    submit("batch", "b3")
+    submit("user", "u1")
+
+    for count in range(1, 5):
+        clock.now += 60
+        with s._cond:
+            s._cond.notify_all()
+        _wait_until(lambda: len(admitted) == count)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert admitted == ["b1", "u1", "b2", "b3"]
+
+
+def test_retry_after_beyond_max_delay_is_raised(clock):
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise TimeoutError("rate limited")
+
+    s = RequestScheduler(max_delay=30, is_retryable=lambda e: True, get_retry_after=lambda e: 120)
+    with pytest.raises(TimeoutError):
+        s.call(request)
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_retry_after_within_max_delay_is_honoured(clock):
+    responses = iter([TimeoutError("rate limited"), "ok"])
+
+    def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    s = RequestScheduler(base_delay=1, max_delay=30, is_retryable=lambda e: True, get_retry_after=lambda e: 5)
+    assert s.call(request) == "ok"
+    assert len(clock.sleeps) == 1
+    assert 5 <= clock.sleeps[0] <= 6
+
+
+def test_only_retryable_errors_are_retried_with_backoff(clock):
+    responses = iter([TimeoutError(), TimeoutError(), "ok"])
+
+    def flaky():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    s = RequestScheduler(max_retries=4, base_delay=1, max_delay=30,
+                         is_retryable=lambda e: isinstance(e, TimeoutError))
+    assert s.call(flaky) == "ok"
+    # Full jitter: attempt n waits up to base_delay * 2**n
+    assert len(clock.sleeps) == 2
+    assert all(0 <= delay <= 2 ** attempt for attempt, delay in enumerate(clock.sleeps))
+
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        s.call(broken)
+    assert len(calls) == 1
+    assert len(clock.sleeps) == 2
+
+
+def test_retries_stop_after_max_retries(clock):
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise TimeoutError()
+
+    s = RequestScheduler(max_retries=2, is_retryable=lambda e: True)
+    with pytest.raises(TimeoutError):
+        s.call(request)
+    assert len(calls) == 3
+    assert len(clock.sleeps) == 2
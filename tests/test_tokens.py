@@ -0,0 +1,64 @@
+from utils.tokens import compact_job_description, count_tokens
+
+REQUIREMENTS = ["Requirements:", "- 5+ years with Python and SQL", "- Experience with Spark"]
+
+
+def test_boilerplate_sections_and_legal_lines_are_stripped():
+    post = "\n".join([
+        "Senior Data Engineer",
+        "",
+        "About us",
+        "We are a fast-growing startup founded in 2015.",
+        "",
+        "Who we are looking for",
+        "- A builder who enjoys messy data",
+        "",
+        "Benefits",
+        "- Unlimited PTO",
+        "",
+        *REQUIREMENTS,
+        "",
+        "We are an equal opportunity employer and hire without regard to race.",
+    ])
+    text = compact_job_description(post)
+    assert "fast-growing startup" not in text
+    assert "Unlimited PTO" not in text
+    assert "equal opportunity" not in text
+    # Starts like the company heading "Who we are", but asks for a candidate
+    assert "Who we are looking for\n- A builder who enjoys messy data" in text
+    assert "\n".join(REQUIREMENTS) in text
+
+
+def test_repeated_lines_are_dropped():
+    post = "Requirements:\n- Python\n- Airflow\n* python\n\n\n\nResponsibilities:\n- Airflow\n- Build pipelines"
+    assert compact_job_description(post) == "Requirements:\n- Python\n- Airflow\n\nResponsibilities:\n- Build pipelines"
+
+
+def test_priority_sections_survive_a_tight_budget():
+    post = "\n".join([
+        "Senior Data Engineer",
+        "We build data tools for logistics teams across Europe and North America.",
+        "",
+        "Life at the office",
+        "Our office has a rooftop terrace, a gym and a library of board games.",
+        "",
+        *REQUIREMENTS,
+    ])
+    budget = sum(count_tokens(line) + 1 for line in REQUIREMENTS) + 2
+    text = compact_job_description(post, budget=budget)
+    assert "\n".join(REQUIREMENTS) in text
+    assert "rooftop" not in text
+    assert "logistics" not in text
+    assert count_tokens(text) <= budget
+
+
+def test_zero_budget_only_cleans():
+    post = "\n".join(REQUIREMENTS + [f"- Tool number {i}" for i in range(200)])
+    assert compact_job_description(post, budget=0) == post
+    assert compact_job_description("Requirements:", budget=0) == "Requirements:"
+
+
+def test_budget_too_small_for_any_line_keeps_the_start():
+    text = compact_job_description("\n".join(REQUIREMENTS), budget=1)
+    assert text
+    assert "Requirements:".startswith(text)
@@ -1,66 +1,243 @@
 import streamlit as st
-from datetime import datetime
-import random
+import threading
+from collections import OrderedDict, deque
+import time
+from utils.charts import lttb_indices
+from utils.config import getenv
+from utils.history_store import AnalysisRecord, get_history_store
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+def current_user_id():
+    """History owner for this session (no auth yet: ``HISTORY_USER_ID`` or "default")"""
+    return st.session_state.get('user_id') or getenv("HISTORY_USER_ID", "default")
+
+
+class RunningStats:
+    """Constant-time history statistics, updated once per record
+
+    Scores are integers in 0-100, so a 101-bin histogram gives exact
+    percentiles without keeping the scores themselves.
+    """
+
+    def __init__(self, success_threshold=70, trend_window=3):
+        self.success_threshold = success_threshold
+        self.trend_window = trend_window
+        self._lock = threading.Lock()
+        # Bumped on every change so derived views know when to rebuild
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total = 0
+            self.best = 0
+            self.successes = 0
+            self.first_scores = []
+            self.recent_scores = deque(maxlen=self.trend_window)
+            self.histogram = [0] * 101
+            self.version += 1
+
+    def add(self, score):
+        score = max(0, min(100, int(score)))
+        with self._lock:
+            self.count += 1
+            self.total += score
+            self.best = max(self.best, score)
+            if score >= self.success_threshold:
+                self.successes += 1
+            if len(self.first_scores) < self.trend_window:
+                self.first_scores.append(score)
+            self.recent_scores.append(score)
+            self.histogram[score] += 1
+            self.version += 1
+
+    def percentile(self, q):
+        """Return the score at percentile ``q`` (0-100), or 0 without history"""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, -(-self.count * q // 100))
+            seen = 0
+            for score, frequency in enumerate(self.histogram):
+                seen += frequency
+                if seen >= rank:
+                    return score
+            return self.best
+
+    def trend(self):
+        """Percent change from the first to the most recent ``trend_window`` scores"""
+        if self.count < 2:
+            return 0
+        recent_avg = sum(self.recent_scores) / len(self.recent_scores)
+        older_avg = sum(self.first_scores) / len(self.first_scores)
+        return ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
+
+    def snapshot(self):
+        with self._lock:
+            if not self.count:
+                return {
+                    'total_analyses': 0,
+                    'avg_score': 0,
+                    'best_score': 0,
+                    'success_rate': 0,
+                    'improvement_trend': 0
+                }
+            return {
+                'total_analyses': self.count,
+                'avg_score': self.total / self.count,
+                'best_score': self.best,
+                'success_rate': self.successes / self.count * 100,
+                'improvement_trend': self.trend()
+            }
+
+
+class HistoryFrame:
+    """Chronologically sorted columnar view of a user's history at one ``version``
+
+    Columns live in over-allocated buffers so newer records are appended in
+    amortized constant time; readers get views of the filled part, which
+    later appends never change. Only the numeric columns the charts need are
+    held; rows to display come from ``Analytics.get_history``.
+    """
+
+    def __init__(self, records, version=0):
+        self.version = version
+        size = len(records)
+        capacity = max(16, size)
+        self._epochs = np.empty(capacity, dtype=np.int64)
+        self._epochs[:size] = np.fromiter((r.epoch for r in records), dtype=np.int64, count=size)
+        self._scores = np.empty(capacity, dtype=np.uint8)
+        self._scores[:size] = np.fromiter((r.score for r in records), dtype=np.uint8, count=size)
+        # Local wall-clock dates, converted once per record rather than per render
+        self._dates = np.empty(capacity, dtype='datetime64[s]')
+        self._dates[:size] = np.array([r.timestamp for r in records], dtype='datetime64[s]')
+        self._size = size
+
+    @property
+    def epochs(self):
+        return self._epochs[:self._size]
+
+    @property
+    def scores(self):
+        return self._scores[:self._size]
+
+    @property
+    def dates(self):
+        return self._dates[:self._size]
+
+    def append(self, record, version):
+        """Add a record newer than every record in the frame"""
+        size = self._size
+        if size == len(self._epochs):
+            self._epochs, self._scores, self._dates = (
+                np.concatenate([column, np.empty_like(column)])
+                for column in (self._epochs, self._scores, self._dates)
+            )
+        self._epochs[size] = record.epoch
+        self._scores[size] = record.score
+        self._dates[size] = np.datetime64(record.timestamp, 's')
+        self._size = size + 1
+        self.version = version
+
+    def __len__(self):
+        return self._size
+
+    def sample_indices(self, max_points):
+        """Indices of at most ``max_points`` records that keep the trend's shape (LTTB)"""
+        return lttb_indices(self.epochs, self.scores, max_points)
+
+    def score_histogram(self, bins=10):
+        """Return ``(counts, bin_edges)`` over the 0-100 score range"""
+        return np.histogram(self.scores, bins=bins, range=(0, 100))
+
+    def trend_line(self):
+        """Least-squares linear fit of score over analysis index, or None below 3 points"""
+        if len(self) < 3:
+            return None
+        x = np.arange(len(self))
+        return np.poly1d(np.polyfit(x, self.scores.astype(float), 1))(x)
+
+
+# One aggregator and frame per user, shared by every page and session in the process
+_running_stats = {}
+_running_stats_lock = threading.Lock()
+# Frames hold a user's full history, so only the most recently used are kept
+_history_frames = OrderedDict()
+_history_frames_lock = threading.Lock()
+MAX_CACHED_FRAMES = 32
+
+
+def get_running_stats(store, user_id):
+    """Return the user's aggregator, seeded from the store on first use"""
+    with _running_stats_lock:
+        key = (id(store), user_id)
+        if key not in _running_stats:
+            stats = RunningStats()
+            for score in store.iter_scores(user_id):
+                stats.add(score)
+            _running_stats[key] = stats
+        return _running_stats[key]
+
 
 class Analytics:
-    def __init__(self):
+    def __init__(self, store=None, user_id=None):
+        self.store = store or get_history_store()
+        self.user_id = user_id or current_user_id()
         self.history_limit = 50
+        self.stats = get_running_stats(self.store, self.user_id)
 
     def add_analysis_record(self, job_title, score, analysis_type, details):
         """Add REAL analysis record to history"""
-        record = {
-            'timestamp': datetime.now(),
-            'job_title': job_title,
-            'score': score,  # REAL score from AI analysis
-            'type': analysis_type,
-            'details': details
-        }
-        
-        if 'analysis_history' not in st.session_state:
-            st.session_state.analysis_history = []
-        
-        st.session_state.analysis_history.append(record)
-        
-        # Update real stats
-        self._update_real_stats()
-        
-        # Keep history limited
-        if len(st.session_state.analysis_history) > self.history_limit:
-            st.session_state.analysis_history = st.session_state.analysis_history[-self.history_limit:]
-
-    def _update_real_stats(self):
-        """Update real statistics based on actual analysis data"""
-        if not st.session_state.analysis_history:
-            return
-            
-        scores = [record['score'] for record in st.session_state.analysis_history]
-        
-        st.session_state.real_stats = {
-            'total_analyses': len(scores),
-            'avg_score': sum(scores) / len(scores),
-            'best_score': max(scores),
-            'success_rate': len([s for s in scores if s >= 70]) / len(scores) * 100,
-            'improvement_trend': self._calculate_trend(scores)
-        }
-
-    def _calculate_trend(self, scores):
-        """Calculate improvement trend from real scores"""
-        if len(scores) < 2:
-            return 0
-            
-        recent_avg = sum(scores[-3:]) / min(3, len(scores))
-        older_avg = sum(scores[:3]) / min(3, len(scores))
-        
-        return ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
+        # REAL score from AI analysis
+        record = AnalysisRecord(time.time(), score, job_title, analysis_type)
+        self.store.add(self.user_id, record, details=details)
+        with _history_frames_lock:
+            previous = self.stats.version
+            self.stats.add(record.score)
+            # Extend a current frame instead of re-reading the whole history
+            frame = _history_frames.get(self._frame_key())
+            if frame is not None and frame.version == previous:
+                frame.append(record, self.stats.version)
+
+    def get_history(self, limit=None, offset=0, since=None, job_title=None, newest_first=True):
+        """Return one page of history, newest first by default"""
+        return self.store.fetch(
+            self.user_id,
+            limit=limit or self.history_limit,
+            offset=offset,
+            since=since,
+            job_title=job_title,
+            newest_first=newest_first
+        )
+
+    def _frame_key(self):
+        return (id(self.store), self.user_id)
+
+    def get_frame(self):
+        """Return the cached columnar history, loaded once and then extended by ``add_analysis_record``"""
+        key = self._frame_key()
+        with _history_frames_lock:
+            frame = _history_frames.get(key)
+            if frame is None or frame.version != self.stats.version:
+                version = self.stats.version
+                records = self.store.fetch(self.user_id, limit=-1, newest_first=False)
+                frame = _history_frames[key] = HistoryFrame(records, version)
+            _history_frames.move_to_end(key)
+            while len(_history_frames) > MAX_CACHED_FRAMES:
+                _history_frames.popitem(last=False)
+            return frame
+
+    def count_since(self, since):
+        return self.store.count(self.user_id, since=since)
+
+    def clear_history(self):
+        self.store.clear(self.user_id)
+        self.stats.reset()
 
     def get_real_stats(self):
         """Get real statistics based on actual analysis data"""
-        if 'real_stats' not in st.session_state:
-            return {
-                'total_analyses': 0,
-                'avg_score': 0,
-                'best_score': 0,
-                'success_rate': 0,
-                'improvement_trend': 0
-            }
-        return st.session_state.real_stats
\ No newline at end of file
+        return self.stats.snapshot()
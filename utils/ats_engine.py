@@ -0,0 +1,285 @@
+import re
+from collections import Counter
+from datetime import datetime
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Canonical skill -> spellings that mean the same thing. Variants are folded
+# into the canonical token before matching, so "JS", "JavaScript" and
+# "ECMAScript" all count as the same skill.
+SKILL_SYNONYMS = {
+    "javascript": ["javascript", "js", "ecmascript", "es6"],
+    "typescript": ["typescript"],
+    "python": ["python", "python3"],
+    "golang": ["golang", "go lang"],
+    "c++": ["c++", "cpp"],
+    "c#": ["c#", "csharp", "c sharp"],
+    "nodejs": ["node.js", "nodejs", "node js", "node"],
+    "react": ["react", "react.js", "reactjs"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "angular": ["angular", "angularjs", "angular.js"],
+    "sql": ["sql", "structured query language"],
+    "postgresql": ["postgresql", "postgres", "psql"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "aws": ["aws", "amazon web services"],
+    "gcp": ["gcp", "google cloud", "google cloud platform"],
+    "azure": ["azure", "microsoft azure"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "docker": ["docker", "containerization"],
+    "ci_cd": ["ci/cd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "machine_learning": ["machine learning", "ml"],
+    "deep_learning": ["deep learning"],
+    "artificial_intelligence": ["artificial intelligence", "ai"],
+    "nlp": ["nlp", "natural language processing"],
+    "computer_vision": ["computer vision"],
+    "data_analysis": ["data analysis", "data analytics", "analytics"],
+    "data_visualization": ["data visualization", "data visualisation", "dataviz"],
+    "tensorflow": ["tensorflow"],
+    "pytorch": ["pytorch", "torch"],
+    "scikit_learn": ["scikit-learn", "scikit learn", "sklearn"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "spark": ["spark", "apache spark", "pyspark"],
+    "tableau": ["tableau"],
+    "power_bi": ["power bi", "powerbi"],
+    "excel": ["excel", "microsoft excel", "ms excel"],
+    "git": ["git", "github", "gitlab"],
+    "linux": ["linux", "unix"],
+    "rest_api": ["restful", "rest api", "rest apis", "restful api"],
+    "graphql": ["graphql"],
+    "microservices": ["microservices", "microservice", "micro-services"],
+    "agile": ["agile", "scrum", "kanban"],
+    "project_management": ["project management"],
+    "product_management": ["product management"],
+    "communication": ["communication", "communication skills", "communicator"],
+    "leadership": ["leadership", "team lead", "led a team", "mentoring", "mentored"],
+    "problem_solving": ["problem solving", "problem-solving", "troubleshooting"],
+    "java": ["java"],
+    "kotlin": ["kotlin"],
+    "swift": ["swift"],
+    "ruby": ["ruby", "ruby on rails", "rails"],
+    "php": ["php"],
+    "rust": ["rust"],
+    "scala": ["scala"],
+    # Not plain "r": a stray single letter (e.g. from "R&D") must not count as a skill
+    "r_lang": ["r programming", "rstudio"],
+    "html": ["html", "html5"],
+    "css": ["css", "css3", "sass", "scss"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "spring": ["spring", "spring boot", "springboot"],
+    "terraform": ["terraform"],
+    "airflow": ["airflow", "apache airflow"],
+    "kafka": ["kafka", "apache kafka"],
+    "redis": ["redis"],
+    "statistics": ["statistics", "statistical analysis", "statistical modeling"],
+    "etl": ["etl", "elt", "data pipelines", "data pipeline"],
+}
+
+SKILLS = frozenset(SKILL_SYNONYMS)
+
+# How canonical skills are shown when it differs from "underscores as spaces"
+SKILL_LABELS = {"r_lang": "r"}
+
+DEGREE_LEVELS = [
+    (4, re.compile(r"\b(ph\.?d|doctorate|doctoral)\b", re.IGNORECASE)),
+    (3, re.compile(r"\b(master'?s?|m\.?sc?|mba|m\.?eng)\b", re.IGNORECASE)),
+    (2, re.compile(r"\b(bachelor'?s?|b\.?sc?|b\.?a\.?|b\.?eng|undergraduate degree)\b", re.IGNORECASE)),
+    (1, re.compile(r"\b(associate'?s? degree|diploma)\b", re.IGNORECASE)),
+]
+
+SECTION_HEADINGS = {
+    "experience": re.compile(r"\b(experience|employment|work history)\b", re.IGNORECASE),
+    "education": re.compile(r"\b(education|academic)\b", re.IGNORECASE),
+    "skills": re.compile(r"\b(skills|technologies|tech stack|competencies)\b", re.IGNORECASE),
+    "contact": re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"),
+}
+
+STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be because been being below between both but by
+can could did do does doing during each etc few for from further had has have having he her here hers him
+his how i if in into is it its itself just least less like may me more most must my no nor not of off on
+once only or other our ours out over own per plus preferred required requirements responsibilities role
+same she should so some such than that the their them then there these they this those through to too
+under until up us very via was we well were what when where which while who whom why will with within
+work working would year years you your team teams strong ability experience including across using use
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_+#]*(?:[./-][a-z0-9+#]+)*")
+_REQUIRED_YEARS = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)", re.IGNORECASE)
+_DATE_RANGE = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now|today)",
+    re.IGNORECASE
+)
+
+# Longest variants first so "machine learning" wins over "learning"
+_SYNONYM_PATTERN = re.compile(
+    r"(?<![\w+#])("
+    + "|".join(
+        re.escape(variant)
+        for variant in sorted(
+            {variant for variants in SKILL_SYNONYMS.values() for variant in variants},
+            key=len,
+            reverse=True,
+        )
+    )
+    + r")(?![\w+#])",
+    re.IGNORECASE,
+)
+_VARIANT_TO_SKILL = {
+    variant: skill for skill, variants in SKILL_SYNONYMS.items() for variant in variants
+}
+
+# Criteria and maximum points, matching the ats_score prompt rubric
+CRITERIA = [
+    ("skills", 30),
+    ("experience", 30),
+    ("education", 15),
+    ("keywords", 15),
+    ("fit", 10),
+]
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVERAGE_RESUME_TOKENS = 450
+KEYWORD_FULL_CREDIT = 2 * (BM25_K1 + 1) / (2 + BM25_K1)
+
+
+def normalize_skills(text):
+    """Fold skill spellings onto canonical tokens (``JS`` -> ``javascript``)"""
+    return _SYNONYM_PATTERN.sub(lambda match: " " + _VARIANT_TO_SKILL[match.group(1).lower()] + " ", text)
+
+
+def skill_label(skill):
+    return SKILL_LABELS.get(skill, skill.replace("_", " "))
+
+
+def tokenize(text):
+    """Lowercase, synonym-normalized tokens without stopwords"""
+    tokens = _TOKEN.findall(normalize_skills(text.lower()))
+    return [token for token in tokens if token not in STOPWORDS and len(token) > 1 or token in SKILLS]
+
+
+class LocalATSScorer:
+    """Deterministic, LLM-free estimate of the ATS rubric score
+
+    Implements the five criteria of the ``ats_score`` prompt with
+    synonym-normalized tokens and BM25-style term weighting, so candidates
+    can be scored in milliseconds and only promising ones sent to the LLM.
+    """
+
+    def __init__(self, max_keywords=40):
+        self.max_keywords = max_keywords
+
+    def score(self, job_description, resume_text):
+        """Return the overall score, per-criterion points and matched/missing skills"""
+        job_tokens = tokenize(job_description)
+        resume_tokens = tokenize(resume_text)
+        job_counts = Counter(job_tokens)
+        resume_counts = Counter(resume_tokens)
+
+        required_skills = [token for token in job_counts if token in SKILLS]
+        matched_skills = [skill for skill in required_skills if skill in resume_counts]
+        missing_skills = [skill for skill in required_skills if skill not in resume_counts]
+
+        ratios = {
+            "skills": self._skills_ratio(required_skills, job_counts, resume_counts),
+            "experience": self._experience_ratio(job_description, resume_text, job_counts, resume_counts),
+            "education": self._education_ratio(job_description, resume_text),
+            "keywords": self._keyword_ratio(job_counts, resume_counts, len(resume_tokens)),
+            "fit": self._fit_ratio(resume_text, job_counts, resume_counts),
+        }
+        breakdown = {name: round(ratios[name] * points, 1) for name, points in CRITERIA}
+        return {
+            "overall": int(round(sum(breakdown.values()))),
+            "breakdown": breakdown,
+            "matched_skills": [skill_label(skill) for skill in matched_skills],
+            "missing_skills": [skill_label(skill) for skill in missing_skills],
+        }
+
+    def _skills_ratio(self, required_skills, job_counts, resume_counts):
+        if not required_skills:
+            return self._cosine(job_counts, resume_counts)
+        # Skills mentioned repeatedly in the job description weigh more
+        weights = self._saturate(np.array([job_counts[skill] for skill in required_skills], dtype=float))
+        present = np.array([skill in resume_counts for skill in required_skills], dtype=float)
+        return float(weights @ present / weights.sum())
+
+    def _keyword_ratio(self, job_counts, resume_counts, resume_length):
+        keywords = [term for term, _ in job_counts.most_common(self.max_keywords)]
+        if not keywords:
+            return 0.0
+        query_weights = self._saturate(np.array([job_counts[term] for term in keywords], dtype=float))
+        resume_tf = np.array([resume_counts.get(term, 0) for term in keywords], dtype=float)
+        # BM25 term scores, scaled so that a keyword mentioned twice in a
+        # resume of average length earns full credit
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * max(resume_length, 1) / AVERAGE_RESUME_TOKENS)
+        term_scores = np.minimum(resume_tf * (BM25_K1 + 1) / (resume_tf + length_norm) / KEYWORD_FULL_CREDIT, 1.0)
+        return float(query_weights @ term_scores / query_weights.sum())
+
+    def _experience_ratio(self, job_description, resume_text, job_counts, resume_counts):
+        required = [int(years) for years in _REQUIRED_YEARS.findall(job_description)]
+        required_years = max(required) if required else 0
+        resume_years = self._resume_years(resume_text)
+
+        if required_years:
+            years_ratio = min(1.0, resume_years / required_years)
+        else:
+            years_ratio = min(1.0, resume_years / 3) if resume_years else 0.5
+        relevance = self._cosine(job_counts, resume_counts)
+        return 0.5 * years_ratio + 0.5 * min(1.0, relevance * 2)
+
+    def _education_ratio(self, job_description, resume_text):
+        required = self._degree_level(job_description)
+        achieved = self._degree_level(resume_text)
+        if not required:
+            return 1.0 if achieved else 0.6
+        return min(1.0, achieved / required)
+
+    def _fit_ratio(self, resume_text, job_counts, resume_counts):
+        sections = sum(1 for pattern in SECTION_HEADINGS.values() if pattern.search(resume_text))
+        return 0.6 * min(1.0, self._cosine(job_counts, resume_counts) * 2) + 0.4 * sections / len(SECTION_HEADINGS)
+
+    @staticmethod
+    def _saturate(term_frequencies):
+        return term_frequencies * (BM25_K1 + 1) / (term_frequencies + BM25_K1)
+
+    @staticmethod
+    def _cosine(job_counts, resume_counts):
+        vocabulary = list(job_counts.keys() | resume_counts.keys())
+        if not vocabulary:
+            return 0.0
+        job_vector = np.array([job_counts.get(term, 0) for term in vocabulary], dtype=float)
+        resume_vector = np.array([resume_counts.get(term, 0) for term in vocabulary], dtype=float)
+        # Log-scaled term frequencies keep long resumes from dominating
+        job_vector, resume_vector = np.log1p(job_vector), np.log1p(resume_vector)
+        norm = np.linalg.norm(job_vector) * np.linalg.norm(resume_vector)
+        return float(job_vector @ resume_vector / norm) if norm else 0.0
+
+    @staticmethod
+    def _degree_level(text):
+        for level, pattern in DEGREE_LEVELS:
+            if pattern.search(text):
+                return level
+        return 0
+
+    @staticmethod
+    def _resume_years(text):
+        """Total years covered by employment date ranges, counting overlaps once"""
+        current_year = datetime.now().year
+        spans = []
+        for start, end in _DATE_RANGE.findall(text):
+            end_year = current_year if not end[0].isdigit() else int(end)
+            if int(start) <= end_year <= current_year:
+                spans.append((int(start), max(end_year, int(start) + 1)))
+        total, covered_until = 0, None
+        for start, end in sorted(spans):
+            if covered_until is not None and start < covered_until:
+                start = covered_until
+            if end > start:
+                total += end - start
+                covered_until = end
+        return total
@@ -0,0 +1,123 @@
+import contextvars
+import csv
+import io
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.ats_engine import LocalATSScorer
+from utils.config import getenv
+
+
+class BatchAnalyzer:
+    """Analyze many resumes against one job description
+
+    Resumes flow through validation, text extraction and scoring on a bounded
+    worker pool. Only a small window of files is in flight at any time, so
+    rasterized pages for a large batch are never held in memory together.
+    """
+
+    def __init__(self, openai_client, pdf_processor, extraction_cache=None, max_workers=None,
+                 prescreen_threshold=None):
+        self.openai_client = openai_client
+        self.pdf_processor = pdf_processor
+        self.extraction_cache = extraction_cache
+        self.max_workers = max_workers or int(getenv("BATCH_MAX_WORKERS", "4"))
+        # Resumes whose local score falls below this never reach the LLM
+        if prescreen_threshold is None:
+            prescreen_threshold = int(getenv("BATCH_PRESCREEN_THRESHOLD", "0"))
+        self.prescreen_threshold = prescreen_threshold
+        self.local_scorer = LocalATSScorer()
+
+    def run(self, job_description, pdf_files, analysis_type="ats_score"):
+        """Yield one result dict per resume as soon as it finishes (not in input order)"""
+        files = iter(pdf_files)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {
+                executor.submit(contextvars.copy_context().run, self.analyze_one, job_description, pdf_file, analysis_type)
+                for pdf_file in itertools.islice(files, self.max_workers * 2)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    next_file = next(files, None)
+                    if next_file is not None:
+                        pending.add(executor.submit(
+                            contextvars.copy_context().run, self.analyze_one, job_description, next_file, analysis_type
+                        ))
+                    yield future.result()
+
+    def analyze_one(self, job_description, pdf_file, analysis_type="ats_score"):
+        """Run the full pipeline for a single resume and return its result record"""
+        result = {
+            'file_name': getattr(pdf_file, 'name', 'resume.pdf'),
+            'score': None,
+            'local_score': None,
+            'status': 'ok',
+            'error': None,
+            'analysis': None,
+            'details': None
+        }
+        try:
+            is_valid, message = self.pdf_processor.validate_pdf(pdf_file)
+            if not is_valid:
+                result.update(status='invalid', error=message)
+                return result
+
+            resume_text = self.openai_client.extract_resume_text(
+                pdf_file, self.pdf_processor, cache=self.extraction_cache
+            )
+            if not resume_text:
+                result.update(status='failed', error="Could not extract text from the PDF")
+                return result
+
+            result['local_score'] = self.local_scorer.score(job_description, resume_text)['overall']
+            if result['local_score'] < self.prescreen_threshold:
+                result['status'] = 'screened_out'
+                return result
+
+            analysis = self.openai_client.analyze_resume(
+                job_description, None, analysis_type, resume_text=resume_text
+            )
+            if analysis.error:
+                result.update(status='failed', error=analysis.error)
+                return result
+
+            result.update(analysis=analysis.text, details=analysis.data)
+            if analysis_type == "ats_score":
+                result['score'] = analysis.score
+                if result['score'] is None:
+                    result.update(status='failed', error="No overall score in the AI response")
+            return result
+
+        except Exception as e:
+            result.update(status='failed', error=str(e))
+            return result
+
+
+def rank_results(results):
+    """Sort results best AI score first, then by local score, with failures at the bottom"""
+    return sorted(
+        results,
+        key=lambda result: (
+            result['score'] is None,
+            -(result['score'] or 0),
+            -(result.get('local_score') or 0),
+            result['file_name']
+        )
+    )
+
+
+def results_to_csv(results):
+    """Render ranked results as CSV text"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['rank', 'file_name', 'score', 'local_score', 'status', 'error'])
+    for rank, result in enumerate(rank_results(results), 1):
+        writer.writerow([
+            rank,
+            result['file_name'],
+            result['score'],
+            result.get('local_score'),
+            result['status'],
+            result['error'] or ''
+        ])
+    return output.getvalue()
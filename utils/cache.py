@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from utils.config import getenv
+
+
+class SQLiteBlobStore:
+    """Size-bounded on-disk key/value store with LRU eviction and TTL"""
+
+    def __init__(self, path, max_bytes, ttl_seconds):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the stored bytes for ``key``, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key, value):
+        """Store ``value`` and evict least recently used entries over the size limit"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            if self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,))
+            self._evict()
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+
+class ExtractionCache:
+    """Content-addressed cache of extracted resume text
+
+    Entries are keyed by the SHA-256 of the PDF bytes together with the
+    extraction settings, so the same upload analyzed several times (or by
+    several sessions) is only extracted once.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def make_key(pdf_bytes, **settings):
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        settings_json = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(f"{digest}:{settings_json}".encode()).hexdigest()
+
+    def get(self, key):
+        blob = self.store.get(key)
+        if blob is None:
+            return None
+        try:
+            return zlib.decompress(blob).decode("utf-8")
+        except (zlib.error, UnicodeDecodeError):
+            return None
+
+    def set(self, key, text):
+        self.store.set(key, zlib.compress(text.encode("utf-8")))
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache shared by all sessions"""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            cache_dir = getenv("CACHE_DIR", ".cache")
+            store = SQLiteBlobStore(
+                os.path.join(cache_dir, "extraction.sqlite3"),
+                max_bytes=int(float(getenv("EXTRACTION_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                ttl_seconds=float(getenv("EXTRACTION_CACHE_TTL_HOURS", "168")) * 3600,
+            )
+            _extraction_cache = ExtractionCache(store)
+        return _extraction_cache
+
+
+class MemoryLRUStore:
+    """In-process key/value store bounded by entry count, with TTL"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created = entry
+            if self.ttl_seconds and time.time() - created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """Cache of LLM analysis results keyed on the normalized prompt and model parameters
+
+    Works with any store exposing ``get``/``set``/``clear`` (``MemoryLRUStore``
+    or ``SQLiteBlobStore``) and counts hits and misses for monitoring.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt, **params):
+        # Indentation and spacing differences must not split the cache
+        normalized = " ".join(prompt.split())
+        params_json = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{params_json}:{normalized}".encode()).hexdigest()
+
+    def get(self, key):
+        value = self.store.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, text):
+        self.store.set(key, text.encode("utf-8"))
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total * 100 if total else 0,
+            }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when disabled
+
+    ``RESPONSE_CACHE_BACKEND`` selects ``memory`` (default), ``sqlite`` or ``none``.
+    """
+    global _response_cache
+    backend = getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    if backend == "none":
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            ttl_seconds = float(getenv("RESPONSE_CACHE_TTL_HOURS", "24")) * 3600
+            if backend == "sqlite":
+                store = SQLiteBlobStore(
+                    os.path.join(getenv("CACHE_DIR", ".cache"), "responses.sqlite3"),
+                    max_bytes=int(float(getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                    ttl_seconds=ttl_seconds,
+                )
+            else:
+                store = MemoryLRUStore(int(getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")), ttl_seconds)
+            _response_cache = ResponseCache(store)
+        return _response_cache
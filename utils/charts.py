@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+from utils.config import getenv
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+_figures = OrderedDict()
+_figures_lock = threading.Lock()
+MAX_CACHED_FIGURES = 256
+
+
+def cached_figure(key, version, build):
+    """Return the figure built for ``key`` at ``version``, calling ``build()`` only on a miss
+
+    Figures are shared across reruns and sessions; callers must not mutate
+    them after they are returned.
+    """
+    with _figures_lock:
+        cached = _figures.get(key)
+        if cached is not None and cached[0] == version:
+            _figures.move_to_end(key)
+            return cached[1]
+
+    figure = build()
+    with _figures_lock:
+        _figures[key] = (version, figure)
+        _figures.move_to_end(key)
+        while len(_figures) > MAX_CACHED_FIGURES:
+            _figures.popitem(last=False)
+    return figure
+
+
+def max_chart_points():
+    return int(getenv("HISTORY_CHART_MAX_POINTS", "2000"))
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with its neighbours, which preserves
+    the visual shape of the series.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        indices[i + 1] = a
+    return indices
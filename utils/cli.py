@@ -0,0 +1,124 @@
+"""Headless resume scoring without Streamlit
+
+Score every PDF in a directory against a job description and emit one JSON
+object per resume (JSONL)::
+
+    python -m utils.cli score --job job.txt --resumes ./resumes --output results.jsonl
+
+``--local-only`` uses the deterministic local scorer and needs no API key.
+``--include-analysis`` adds the AI analysis (``analysis``) and, for ATS
+scores, its parsed JSON result (``details``) to each record.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+from utils.ats_engine import LocalATSScorer
+from utils.batch import BatchAnalyzer
+from utils.cache import get_extraction_cache
+from utils.pdf_processor import PDFProcessor
+
+
+class PDFUpload(io.BytesIO):
+    """In-memory PDF exposing the ``name``/``size`` attributes of a Streamlit upload"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = path
+        self.size = len(self.getbuffer())
+
+
+def iter_pdf_uploads(directory):
+    """Load PDFs one at a time so only in-flight resumes are held in memory"""
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if os.path.isfile(path) and entry.lower().endswith(".pdf"):
+            yield PDFUpload(path)
+
+
+def score_locally(job_description, pdf_files, pdf_processor):
+    """Yield result records using only the text layer and the local scorer"""
+    scorer = LocalATSScorer()
+    for pdf_file in pdf_files:
+        result = {
+            'file_name': pdf_file.name,
+            'score': None,
+            'local_score': None,
+            'status': 'ok',
+            'error': None
+        }
+        is_valid, message = pdf_processor.validate_pdf(pdf_file)
+        text = pdf_processor.extract_text(pdf_file) if is_valid else ""
+        if not is_valid:
+            result.update(status='invalid', error=message)
+        elif not pdf_processor.has_usable_text(text):
+            result.update(status='failed', error="No usable text layer (scanned PDF?)")
+        else:
+            local = scorer.score(job_description, text)
+            result.update(local_score=local['overall'], breakdown=local['breakdown'],
+                          missing_skills=local['missing_skills'])
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.cli", description="Headless resume scoring")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="score a directory of PDF resumes")
+    score.add_argument("--job", required=True, help="text file with the job description")
+    score.add_argument("--resumes", required=True, help="directory containing PDF resumes")
+    score.add_argument("--output", help="JSONL output file (default: stdout)")
+    score.add_argument("--workers", type=int, help="parallel resumes (default: BATCH_MAX_WORKERS)")
+    score.add_argument("--prescreen", type=int, help="skip the AI for local scores below this")
+    score.add_argument("--local-only", action="store_true", help="use the local scorer only, no AI calls")
+    score.add_argument("--include-analysis", action="store_true",
+                       help="include the full AI analysis text and its structured result")
+    score.add_argument("--verbose", action="store_true", help="log progress to stderr")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+
+    with open(args.job, encoding="utf-8") as f:
+        job_description = f.read()
+    if not job_description.strip():
+        parser.error("the job description file is empty")
+
+    pdf_processor = PDFProcessor()
+    pdf_files = iter_pdf_uploads(args.resumes)
+    if args.local_only:
+        results = score_locally(job_description, pdf_files, pdf_processor)
+    else:
+        from utils.openai_client import OpenAIClient, OpenAIClientError
+        try:
+            client = OpenAIClient()
+        except OpenAIClientError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        analyzer = BatchAnalyzer(
+            client, pdf_processor,
+            extraction_cache=get_extraction_cache(),
+            max_workers=args.workers,
+            prescreen_threshold=args.prescreen
+        )
+        results = analyzer.run(job_description, pdf_files)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for count, result in enumerate(results, 1):
+            if not args.include_analysis:
+                result.pop('analysis', None)
+                result.pop('details', None)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            logging.info("%d scored: %s (%s)", count, result['file_name'], result['status'])
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
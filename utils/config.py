@@ -0,0 +1,26 @@
+import os
+import threading
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_environment():
+    """Load the .env file once, on first use rather than at import time"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            try:
+                from dotenv import load_dotenv
+                load_dotenv()
+            except ImportError:
+                pass
+            _env_loaded = True
+
+
+def getenv(name, default=None):
+    """``os.getenv`` that makes sure .env values have been loaded"""
+    load_environment()
+    return os.getenv(name, default)
@@ -0,0 +1,190 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from utils.config import getenv
+
+
+class AnalysisRecord:
+    """Compact history entry
+
+    Holds epoch seconds, a 0-100 score (small ints are shared by CPython)
+    and interned job title/type strings. The analysis excerpt stays in the
+    store and is loaded on demand with ``HistoryStore.get_details``.
+    """
+
+    __slots__ = ('record_id', 'epoch', 'score', 'job_title', 'type')
+
+    def __init__(self, epoch, score, job_title, analysis_type, record_id=None):
+        self.record_id = record_id
+        self.epoch = int(epoch)
+        self.score = max(0, min(100, int(score)))
+        self.job_title = sys.intern(job_title)
+        self.type = sys.intern(analysis_type)
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.epoch)
+
+
+class HistoryStore(ABC):
+    """Interface for durable analysis history backends
+
+    History is a list of ``AnalysisRecord`` per ``user_id``; each record's
+    details text is stored alongside it but only read on request.
+    """
+
+    @abstractmethod
+    def add(self, user_id, record, details=None):
+        ...
+
+    @abstractmethod
+    def get_details(self, record_id):
+        ...
+
+    @abstractmethod
+    def fetch(self, user_id, limit=50, offset=0, since=None, until=None, job_title=None, newest_first=True):
+        """Return one page of records matching the filters"""
+
+    @abstractmethod
+    def count(self, user_id, since=None):
+        ...
+
+    @abstractmethod
+    def iter_scores(self, user_id):
+        """Yield every score in chronological order"""
+
+    @abstractmethod
+    def clear(self, user_id):
+        ...
+
+    def flush(self):
+        """Persist buffered writes (no-op for unbuffered backends)"""
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """SQLite history in WAL mode with indexed, paginated queries
+
+    Writes are buffered and committed in batches; any read flushes pending
+    writes first so a user always sees their latest analysis.
+    """
+
+    def __init__(self, path, batch_size=20, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                job_title TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                details TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_user_time ON analyses(user_id, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_analyses_user_title_time ON analyses(user_id, job_title, timestamp);
+            """
+        )
+        self._conn.commit()
+
+    def add(self, user_id, record, details=None):
+        with self._lock:
+            self._pending.append((
+                user_id, record.epoch, record.job_title, record.score, record.type, details
+            ))
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self._conn.executemany(
+                    "INSERT INTO analyses (user_id, timestamp, job_title, score, type, details) VALUES (?, ?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+                self._conn.commit()
+                self._pending = []
+            self._last_flush = time.monotonic()
+
+    def _query(self, sql, params):
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, params).fetchall()
+
+    def fetch(self, user_id, limit=50, offset=0, since=None, until=None, job_title=None, newest_first=True):
+        clauses, params = ["user_id = ?"], [user_id]
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until.timestamp())
+        if job_title is not None:
+            clauses.append("job_title = ?")
+            params.append(job_title)
+        order = "DESC" if newest_first else "ASC"
+        rows = self._query(
+            f"SELECT timestamp, score, job_title, type, id FROM analyses "
+            f"WHERE {' AND '.join(clauses)} ORDER BY timestamp {order}, id {order} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [AnalysisRecord(*row) for row in rows]
+
+    def get_details(self, record_id):
+        rows = self._query("SELECT details FROM analyses WHERE id = ?", (record_id,))
+        return rows[0][0] if rows else None
+
+    def count(self, user_id, since=None):
+        if since is None:
+            return self._query("SELECT COUNT(*) FROM analyses WHERE user_id = ?", (user_id,))[0][0]
+        return self._query(
+            "SELECT COUNT(*) FROM analyses WHERE user_id = ? AND timestamp >= ?",
+            (user_id, since.timestamp()),
+        )[0][0]
+
+    def iter_scores(self, user_id):
+        for (score,) in self._query(
+            "SELECT score FROM analyses WHERE user_id = ? ORDER BY timestamp ASC, id ASC", (user_id,)
+        ):
+            yield score
+
+    def clear(self, user_id):
+        with self._lock:
+            self.flush()
+            self._conn.execute("DELETE FROM analyses WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+
+
+_history_store = None
+_history_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Return the process-wide history store (``HISTORY_DB_PATH``, default ``data/history.sqlite3``)"""
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            _history_store = SQLiteHistoryStore(
+                getenv("HISTORY_DB_PATH", os.path.join("data", "history.sqlite3")),
+                batch_size=int(getenv("HISTORY_WRITE_BATCH_SIZE", "20")),
+                flush_interval=float(getenv("HISTORY_FLUSH_INTERVAL", "2")),
+            )
+            atexit.register(_history_store.flush)
+        return _history_store
@@ -0,0 +1,109 @@
+import logging
+import math
+import threading
+import time
+from utils.config import getenv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "google/gemini-flash-1.5"
+
+# Tasks and their default policies: OCR-style extraction and housekeeping
+# calls go to the cheapest configured model, the final analysis keeps the
+# configured order so the strongest model can be listed first
+TASK_POLICIES = {
+    "extraction": "cheapest",
+    "analysis": "ordered",
+    "utility": "cheapest",
+}
+
+
+def _parse_models(value):
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def _parse_prices(value):
+    """Parse ``model=price,...`` (USD per million input tokens)"""
+    prices = {}
+    for item in value.split(","):
+        model, _, price = item.partition("=")
+        if model.strip() and price.strip():
+            prices[model.strip()] = float(price)
+    return prices
+
+
+class ModelRouter:
+    """Choose models per task and fall back to the next one on failure
+
+    Each task reads a comma-separated model list from ``MODEL_<TASK>``
+    (e.g. ``MODEL_ANALYSIS``) and a policy from ``MODEL_<TASK>_POLICY``:
+
+    - ``ordered``: the configured order
+    - ``cheapest``: ascending ``MODEL_PRICES``, unpriced models last
+    - ``fastest``: ascending observed latency, unmeasured models first
+
+    A model that raised one of ``retry_on`` is moved to the back of every
+    list for ``MODEL_COOLDOWN_SECONDS``.
+    """
+
+    def __init__(self, retry_on=(Exception,)):
+        self.retry_on = retry_on
+        self.models = {
+            task: _parse_models(getenv(f"MODEL_{task.upper()}", DEFAULT_MODEL)) or [DEFAULT_MODEL]
+            for task in TASK_POLICIES
+        }
+        self.policies = {
+            task: getenv(f"MODEL_{task.upper()}_POLICY", policy)
+            for task, policy in TASK_POLICIES.items()
+        }
+        self.prices = _parse_prices(getenv("MODEL_PRICES", ""))
+        self.cooldown = float(getenv("MODEL_COOLDOWN_SECONDS", "60"))
+        self._latency = {}
+        self._failed_at = {}
+        self._lock = threading.Lock()
+
+    def model_key(self, task):
+        """Identify the task's configured models, for cache keys"""
+        return ",".join(self.models[task])
+
+    def candidates(self, task):
+        """Return the task's models in the order they should be tried"""
+        models = list(self.models[task])
+        policy = self.policies[task]
+        with self._lock:
+            if policy == "cheapest":
+                models.sort(key=lambda model: self.prices.get(model, math.inf))
+            elif policy == "fastest":
+                models.sort(key=lambda model: self._latency.get(model, 0.0))
+            now = time.monotonic()
+            cooling = {
+                model for model in models
+                if now - self._failed_at.get(model, -math.inf) < self.cooldown
+            }
+        return [model for model in models if model not in cooling] + [model for model in models if model in cooling]
+
+    def call(self, task, request):
+        """Call ``request(model)`` with each candidate until one succeeds
+
+        Errors outside ``retry_on`` propagate immediately; when every model
+        fails the last error is raised.
+        """
+        last_error = None
+        for model in self.candidates(task):
+            started = time.monotonic()
+            try:
+                result = request(model)
+            except self.retry_on as e:
+                logger.warning("Model %s failed for %s: %s", model, task, e)
+                with self._lock:
+                    self._failed_at[model] = time.monotonic()
+                last_error = e
+                continue
+            self._record_latency(model, time.monotonic() - started)
+            return result
+        raise last_error
+
+    def _record_latency(self, model, seconds, weight=0.3):
+        with self._lock:
+            previous = self._latency.get(model)
+            self._latency[model] = seconds if previous is None else previous + weight * (seconds - previous)
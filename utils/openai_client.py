@@ -1,128 +1,573 @@
-import openai
-import os
-from dotenv import load_dotenv
-import streamlit as st
-import base64
-import io
-from PIL import Image
-import requests
+import contextvars
+import itertools
 import json
+import logging
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.cache import ExtractionCache, ResponseCache, get_response_cache
+from utils.config import getenv
+from utils.lazy import lazy_import
+from utils.model_router import ModelRouter
+from utils.prompts import SYSTEM_PROMPT, get_prompt_template
+from utils.scheduler import build_scheduler, retry_after_seconds
+from utils.scoring import JSON_OVERALL_SCORE_PATTERN, parse_ats_result, render_ats_header, render_ats_markdown
+from utils.tokens import compact_job_description, compact_resume, count_tokens
+
+# The SDK pulls in httpx and pydantic; defer that until a client is built
+openai = lazy_import("openai")
+
+logger = logging.getLogger(__name__)
+
+_VISION_PROMPT = "Extract ALL text from this resume image exactly as it appears. Include everything: contact info, work experience, education, skills, projects, achievements. Preserve the formatting and order."
+
+# Batched vision responses start each page with this marker
+_PAGE_MARKER = re.compile(r"^=== PAGE (\d+) ===[ \t]*$", re.MULTILINE)
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+class OpenAIClientError(Exception):
+    """Raised when the AI client cannot be configured"""
+
+
+def get_openai_client(on_warning=None):
+    """Return the process-wide OpenAIClient shared by every session and rerun
+    
+    Reusing one client keeps its HTTP connection pool warm, so interactions
+    don't pay for new TLS handshakes and open sockets stay bounded per worker.
+    ``on_warning`` only applies when the shared client is first created.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = OpenAIClient(on_warning=on_warning)
+        return _shared_client
+
+
+def _build_http_client():
+    """Build the pooled HTTP client, or None to use the SDK default"""
+    try:
+        import httpx
+    except ImportError:
+        return None
+    
+    limits = httpx.Limits(
+        max_connections=int(getenv("OPENAI_POOL_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(getenv("OPENAI_POOL_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(getenv("OPENAI_POOL_KEEPALIVE_EXPIRY", "120"))
+    )
+    # HTTP/2 multiplexes concurrent calls over one connection but needs h2
+    http2 = getenv("OPENAI_HTTP2", "1") != "0"
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+    
+    client_class = getattr(openai, "DefaultHttpxClient", httpx.Client)
+    return client_class(limits=limits, http2=http2)
+
+
+class AnalysisStream:
+    """Chunks of a streamed analysis, plus its outcome once they are exhausted
+
+    ``error`` is the failure message (None on success) and ``score`` the
+    validated overall score of structured analyses.
+    """
+
+    def __init__(self, produce):
+        self.error = None
+        self.score = None
+        self._chunks = produce(self)
+
+    def __iter__(self):
+        return self._chunks
+
+
+class AnalysisResult:
+    """Outcome of a complete analysis
+
+    ``text`` is the rendered analysis and ``error`` the failure message;
+    exactly one of them is set. Structured analyses also carry their
+    validated result in ``data`` and its overall score in ``score``.
+    """
+
+    def __init__(self, text=None, error=None, data=None, score=None):
+        self.text = text
+        self.error = error
+        self.data = data
+        self.score = score
 
-load_dotenv()
 
 class OpenAIClient:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.base_url = os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
+    def __init__(self, on_warning=None):
+        # Non-fatal problems are reported here; the UI passes st.warning
+        self.on_warning = on_warning or logger.warning
+        self.api_key = getenv("OPENAI_API_KEY")
+        self.base_url = getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
+        # Page images are extracted in parallel; cap in-flight vision calls
+        # and bound how long any single call may take (seconds)
+        self.vision_concurrency = int(getenv("VISION_MAX_CONCURRENCY", "4"))
+        self.vision_timeout = float(getenv("VISION_REQUEST_TIMEOUT", "60"))
+        self.vision_max_tokens = 1500  # output tokens per page
+        # Several pages share one vision request while their estimated input
+        # tokens fit the budget; VISION_PAGES_PER_REQUEST=1 disables batching
+        self.vision_pages_per_request = int(getenv("VISION_PAGES_PER_REQUEST", "4"))
+        self.vision_batch_tokens = int(getenv("VISION_BATCH_TOKEN_BUDGET", "4500"))
+        self.vision_tokens_per_image = int(getenv("VISION_TOKENS_PER_IMAGE", "1100"))
+        self.analysis_max_tokens = 2000
+        # Prompt inputs are cleaned and trimmed to these token budgets (0 = no limit)
+        self.job_description_token_budget = int(getenv("JOB_DESCRIPTION_TOKEN_BUDGET", "1500"))
+        self.resume_token_budget = int(getenv("RESUME_TOKEN_BUDGET", "4000"))
+        self.analysis_temperature = 0.7
+        # Analysis types that send page images with the prompt in one request
+        # when there is no usable text layer, instead of extracting text first;
+        # pages beyond the resume token budget are still extracted first
+        self.fused_analysis_types = {
+            analysis_type.strip()
+            for analysis_type in getenv("FUSED_ANALYSIS_TYPES", "ats_score").split(",")
+            if analysis_type.strip()
+        }
+        # Analysis types answered in JSON mode and rendered to markdown locally
+        self.structured_analysis_types = {"ats_score"}
+        self.system_prompt = SYSTEM_PROMPT
+        self.response_cache = get_response_cache()
+        # Models come from MODEL_EXTRACTION / MODEL_ANALYSIS / MODEL_UTILITY;
+        # API errors and timeouts fall through to the next configured model
+        self.router = ModelRouter(retry_on=(openai.APIError,))
+        # Every request waits for RPM/TPM budget and retries 429/5xx/timeouts
+        self.scheduler = build_scheduler(is_retryable=_is_retryable, get_retry_after=_get_retry_after)
         
         if not self.api_key:
-            st.error("❌ API key not found. Please check your .env file.")
-            st.stop()
+            raise OpenAIClientError("API key not found. Please check your .env file.")
         
         try:
             self.client = openai.OpenAI(
                 api_key=self.api_key,
-                base_url=self.base_url
+                base_url=self.base_url,
+                http_client=_build_http_client(),
+                # Retries are handled by the scheduler
+                max_retries=0
             )
-            st.success("✅ Connected to AI API successfully!")
         except Exception as e:
-            st.error(f"❌ Failed to initialize AI client: {str(e)}")
-            st.stop()
+            raise OpenAIClientError(f"Failed to initialize AI client: {str(e)}") from e
 
-    def analyze_resume(self, job_description, resume_images, analysis_type):
-        """Real AI analysis using OpenRouter API"""
-        try:
-            if not job_description.strip():
-                return "❌ Please provide a job description to analyze against."
-            
-            if not resume_images:
-                return "❌ No resume content found. Please upload a valid PDF resume."
+    def _create(self, task, **request):
+        """Send a chat completion through the model router and the request scheduler"""
+        tokens = _estimate_tokens(request["messages"], self.vision_tokens_per_image) + request.get("max_tokens", 0)
+        return self.router.call(task, lambda model: self.scheduler.call(
+            lambda: self.client.chat.completions.create(model=model, **request),
+            tokens=tokens,
+            usage=_total_tokens
+        ))
 
-            # Extract text from images
-            extracted_text = self._extract_text_from_images(resume_images)
+    def analyze_resume(self, job_description, resume_images, analysis_type, resume_text=None, on_progress=None):
+        """Real AI analysis using OpenRouter API, returning an ``AnalysisResult``
+        
+        When ``resume_text`` comes from the PDF text layer the vision
+        extraction round-trip is skipped and ``resume_images`` may be empty.
+        Failures are reported on the result's ``error`` rather than raised.
+        """
+        structured = analysis_type in self.structured_analysis_types
+        try:
+            error, messages, cache_key = self._prepare_analysis(
+                job_description, resume_images, analysis_type, resume_text
+            )
+            if error:
+                return AnalysisResult(error=error)
             
-            if not extracted_text or len(extracted_text.strip()) < 50:
-                return "❌ Could not extract sufficient text from the resume. Please ensure your PDF contains clear, selectable text."
-
-            # Get the appropriate prompt
-            prompt = self._get_analysis_prompt(analysis_type, job_description, extracted_text)
+            if self.response_cache is not None:
+                cached_result = self.response_cache.get(cache_key)
+                if cached_result:
+                    if structured:
+                        data = parse_ats_result(cached_result)
+                        return AnalysisResult(text=render_ats_markdown(data), data=data, score=data['overall_score'])
+                    return AnalysisResult(text=cached_result)
             
             # Call AI API
-            with st.spinner("🔍 AI is analyzing your resume content..."):
-                response = self.client.chat.completions.create(
-                    model="google/gemini-flash-1.5",  # Free and good model
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert resume analyst and career coach. Be brutally honest and provide specific, actionable feedback."
-                        },
-                        {
-                            "role": "user", 
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=2000,
-                    temperature=0.7
-                )
-                
-                if response.choices and response.choices[0].message.content:
-                    return response.choices[0].message.content
-                else:
-                    return "❌ No response received from AI."
+            if on_progress:
+                on_progress("🔍 AI is analyzing your resume content...")
+            response = self._create(
+                "analysis",
+                messages=messages,
+                max_tokens=self.analysis_max_tokens,
+                temperature=self.analysis_temperature,
+                **self._response_options(analysis_type)
+            )
+            
+            if not (response.choices and response.choices[0].message.content):
+                return AnalysisResult(error="❌ No response received from AI.")
+            
+            result = AnalysisResult(text=response.choices[0].message.content)
+            if structured:
+                result.data = parse_ats_result(result.text)
+                result.text = render_ats_markdown(result.data)
+                result.score = result.data['overall_score']
+            if self.response_cache is not None:
+                self.response_cache.set(cache_key, _cache_value(result.text, result.data))
+            return result
             
         except Exception as e:
-            error_msg = f"❌ Analysis failed: {str(e)}"
-            st.error(error_msg)
-            return error_msg
+            logger.exception("Resume analysis failed")
+            return AnalysisResult(error=f"❌ Analysis failed: {str(e)}")
 
-    def _extract_text_from_images(self, resume_images):
-        """Extract text from resume images using AI vision"""
+    def analyze_resume_stream(self, job_description, resume_images, analysis_type, resume_text=None):
+        """Like ``analyze_resume`` but returns an ``AnalysisStream`` of chunks as they are generated
+        
+        Errors are yielded as a ``❌`` message so the consumer can render the
+        stream without special casing, and are also reported on the stream's
+        ``error`` attribute, since a failure may follow partial output.
+        """
+        return AnalysisStream(lambda outcome: self._stream_analysis(
+            outcome, job_description, resume_images, analysis_type, resume_text
+        ))
+
+    def _stream_analysis(self, outcome, job_description, resume_images, analysis_type, resume_text):
+        structured = analysis_type in self.structured_analysis_types
         try:
-            all_extracted_text = ""
+            error, messages, cache_key = self._prepare_analysis(
+                job_description, resume_images, analysis_type, resume_text
+            )
+            if error:
+                outcome.error = error
+                yield error
+                return
             
-            for img_data in resume_images:
-                # Use OpenRouter's vision capability
-                image_data = base64.b64decode(img_data["data"])
-                
-                response = self.client.chat.completions.create(
-                    model="google/gemini-flash-1.5",  # Supports vision
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text", 
-                                    "text": "Extract ALL text from this resume image exactly as it appears. Include everything: contact info, work experience, education, skills, projects, achievements. Preserve the formatting and order."
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{img_data['data']}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=1500
-                )
-                
-                if response.choices and response.choices[0].message.content:
-                    all_extracted_text += f"\n\n--- Page {img_data['page_number']} ---\n{response.choices[0].message.content}"
+            if self.response_cache is not None:
+                cached_result = self.response_cache.get(cache_key)
+                if cached_result:
+                    if structured:
+                        data = parse_ats_result(cached_result)
+                        outcome.score = data['overall_score']
+                        cached_result = render_ats_markdown(data)
+                    yield cached_result
+                    return
             
-            return all_extracted_text
+            # Falls back to the next model only before the first chunk arrives
+            stream = self._create(
+                "analysis",
+                messages=messages,
+                max_tokens=self.analysis_max_tokens,
+                temperature=self.analysis_temperature,
+                stream=True,
+                **self._response_options(analysis_type)
+            )
+            deltas = (
+                chunk.choices[0].delta.content for chunk in stream
+                if chunk.choices and chunk.choices[0].delta.content
+            )
+            
+            if structured:
+                data = yield from self._stream_structured(deltas)
+                result = render_ats_markdown(data) if data else ""
+            else:
+                chunks = []
+                for delta in deltas:
+                    chunks.append(delta)
+                    yield delta
+                result = "".join(chunks)
+            
+            if not result:
+                outcome.error = "❌ No response received from AI."
+                yield outcome.error
+                return
+            if structured:
+                outcome.score = data['overall_score']
+            if self.response_cache is not None:
+                self.response_cache.set(cache_key, _cache_value(result, data if structured else None))
+            
+        except Exception as e:
+            logger.exception("Streamed resume analysis failed")
+            outcome.error = f"❌ Analysis failed: {str(e)}"
+            yield f"\n\n{outcome.error}"
+
+    def _stream_structured(self, deltas):
+        """Yield the markdown for a streamed JSON result and return the parsed result
+        
+        The header is yielded as soon as ``overall_score`` (the first key)
+        has arrived; the rest is rendered once the JSON is complete and
+        validated. Returns None when nothing was streamed and raises
+        ValueError for malformed JSON.
+        """
+        chunks = []
+        header = None
+        for delta in deltas:
+            chunks.append(delta)
+            if header is None:
+                match = JSON_OVERALL_SCORE_PATTERN.search("".join(chunks))
+                if match:
+                    header = render_ats_header(min(100, int(match.group(1))))
+                    yield header
+        if not chunks:
+            return None
+        
+        data = parse_ats_result("".join(chunks))
+        result = render_ats_markdown(data)
+        if header is None:
+            yield result
+        elif result.startswith(header):
+            yield result[len(header):]
+        else:
+            # The early score disagreed with the validated one; show the full result
+            yield "\n\n---\n\n" + result
+        return data
+
+    def _response_options(self, analysis_type):
+        if analysis_type in self.structured_analysis_types:
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    def _prepare_analysis(self, job_description, resume_images, analysis_type, resume_text):
+        """Validate the inputs and build the chat messages, returning (error, messages, cache_key)"""
+        if not job_description.strip():
+            return "❌ Please provide a job description to analyze against.", None, None
+        
+        if not resume_images and not resume_text:
+            return "❌ No resume content found. Please upload a valid PDF resume.", None, None
+
+        template = get_prompt_template(analysis_type)
+        if template is None:
+            return f"❌ Unknown analysis type: {analysis_type}", None, None
+
+        # Benefits/EEO boilerplate and repeated lines only cost tokens
+        job_description = compact_job_description(job_description, self.job_description_token_budget)
+
+        images = []
+        fused = not resume_text and self.uses_fused_analysis(analysis_type)
+        if fused:
+            resume_images = list(resume_images)
+            fused = self._fits_fused_request(len(resume_images))
+            if not fused:
+                logger.info("%d pages exceed the fused request budget; extracting text first", len(resume_images))
+        if fused:
+            # Fused mode: the model reads the pages and analyzes them in one call
+            images = resume_images
+            prompt = template.render(job_description, "[The resume is provided as the page images attached below.]")
+            content = [{"type": "text", "text": prompt}] + [_image_content(img_data) for img_data in images]
+        else:
+            # Prefer the native text layer, fall back to extracting text from images
+            if resume_text:
+                extracted_text = resume_text
+            else:
+                extracted_text = self._extract_text_from_images(resume_images)
             
+            if not extracted_text or len(extracted_text.strip()) < 50:
+                return "❌ Could not extract sufficient text from the resume. Please ensure your PDF contains clear, selectable text.", None, None
+
+            prompt = template.render(job_description, compact_resume(extracted_text, self.resume_token_budget))
+            content = prompt
+        
+        messages = [
+            {
+                "role": "system", 
+                "content": self.system_prompt
+            },
+            {
+                "role": "user", 
+                "content": content
+            }
+        ]
+        
+        # Identical prompts, pages, template versions and model parameters reuse the stored answer
+        cache_key = ResponseCache.make_key(
+            self.system_prompt + "\n" + prompt + "".join(img_data["data"] for img_data in images),
+            model=self.router.model_key("analysis"),
+            template=template.key,
+            max_tokens=self.analysis_max_tokens,
+            temperature=self.analysis_temperature,
+            **self._response_options(analysis_type)
+        )
+        return None, messages, cache_key
+
+    def uses_fused_analysis(self, analysis_type):
+        """Whether image-only resumes are analyzed in a single multimodal call"""
+        return analysis_type in self.fused_analysis_types
+
+    def _fits_fused_request(self, page_count):
+        """Whether ``page_count`` page images fit one fused request
+
+        The pages stand in for the resume text, so their estimated tokens
+        share the resume's input budget. Longer resumes are extracted to
+        text first, which ``compact_resume`` can then trim.
+        """
+        budget = self.resume_token_budget
+        return budget <= 0 or page_count * self.vision_tokens_per_image <= budget
+
+    def extract_resume_text(self, pdf_file, pdf_processor, cache=None, on_progress=None, use_vision=True):
+        """Get the text of an uploaded resume, reusing earlier extractions
+        
+        The text layer is read first and decided on page by page: pages
+        whose layer is usable keep it, and only pages with an empty or
+        unreadable layer are rasterized and sent to the vision model. Both
+        are merged in page order. With ``use_vision=False`` None is returned
+        instead whenever a page would need vision, for callers that send the
+        pages to a fused analysis. Results are stored in ``cache`` keyed by
+        the PDF content and extraction settings. ``on_progress`` receives a
+        short message as each stage starts.
+        """
+        report = on_progress or (lambda message: None)
+        pdf_file.seek(0)
+        key = ExtractionCache.make_key(
+            pdf_file.read(),
+            model=self.router.model_key("extraction"),
+            **pdf_processor.extraction_settings()
+        )
+        pdf_file.seek(0)
+        
+        if cache is not None:
+            cached_text = cache.get(key)
+            if cached_text:
+                return cached_text
+        
+        report("📄 Reading the PDF text layer...")
+        page_texts = pdf_processor.extract_page_texts(pdf_file)
+        pages = pdf_processor.usable_text_pages(page_texts)
+        if not page_texts or len(pages) < len(page_texts):
+            if not use_vision:
+                return None
+            report("👁️ Rendering pages and extracting text with AI vision...")
+            try:
+                # Pages are rendered lazily and released once their call returns
+                image_pages = self.extract_pages_from_images(pdf_processor.page_images(pdf_file, skip_pages=pages))
+            except Exception as e:
+                self.on_warning(f"⚠️ Text extraction issue: {str(e)}")
+                # Neither template fallback text nor a partial extraction is cached
+                return self._fallback_text_extraction(len(page_texts))
+            for page_number, page_text in image_pages.items():
+                pages.setdefault(page_number, page_text)
+        
+        text = _join_pages(pages)
+        if text and cache is not None:
+            cache.set(key, text)
+        return text or None
+
+    def _extract_text_from_images(self, resume_images):
+        """Extract text from resume images, falling back to a template prompt on failure"""
+        try:
+            return self.extract_text_from_images(resume_images)
         except Exception as e:
-            st.warning(f"⚠️ Text extraction issue: {str(e)}")
+            self.on_warning(f"⚠️ Text extraction issue: {str(e)}")
             # Fallback: Use a simple prompt for text extraction
-            return self._fallback_text_extraction(resume_images)
+            return self._fallback_text_extraction(len(resume_images))
+
+    def extract_text_from_images(self, resume_images):
+        """Extract text from resume images using AI vision, with page markers"""
+        return _join_pages(self.extract_pages_from_images(resume_images))
+
+    def extract_pages_from_images(self, resume_images):
+        """Extract the text of resume images using AI vision, returning {page_number: text}
+        
+        ``resume_images`` may be a lazy iterable. Pages are grouped into
+        multi-page requests (see ``_group_pages``); at most
+        ``VISION_MAX_CONCURRENCY`` requests are in flight at once. Pages
+        that came back empty are left out.
+        """
+        groups = self._group_pages(resume_images)
+        pages = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.vision_concurrency)) as executor:
+            pending = {
+                executor.submit(contextvars.copy_context().run, self._extract_group_text, group)
+                for group in itertools.islice(groups, self.vision_concurrency)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pages.update(
+                        (page_number, page_text) for page_number, page_text in future.result() if page_text
+                    )
+                    next_group = next(groups, None)
+                    if next_group is not None:
+                        pending.add(executor.submit(contextvars.copy_context().run, self._extract_group_text, next_group))
+        return pages
 
-    def _fallback_text_extraction(self, resume_images):
-        """Fallback text extraction without vision"""
+    def _group_pages(self, resume_images):
+        """Lazily group pages so each vision request stays under the token budget"""
+        group = []
+        for img_data in resume_images:
+            if group and (
+                len(group) >= self.vision_pages_per_request
+                or (len(group) + 1) * self.vision_tokens_per_image > self.vision_batch_tokens
+            ):
+                yield group
+                group = []
+            group.append(img_data)
+        if group:
+            yield group
+
+    def _extract_group_text(self, group):
+        """Extract several pages in one request, returning [(page_number, text)]
+
+        Pages missing from the reply, or cut off because the reply hit its
+        token limit, are retried one page per request.
+        """
+        if len(group) == 1:
+            return [self._extract_page_text(group[0])]
+        
+        page_numbers = [img_data["page_number"] for img_data in group]
+        content = [{
+            "type": "text",
+            "text": (
+                f"{_VISION_PROMPT}\n\nThere are {len(group)} page images below. "
+                "Start the text of each page with a line of the form '=== PAGE <number> ===' "
+                "using the page number given before its image."
+            )
+        }]
+        for img_data in group:
+            content.append({"type": "text", "text": f"Page {img_data['page_number']}:"})
+            content.append(_image_content(img_data))
+        
+        response = self._create(
+            "extraction",
+            messages=[{"role": "user", "content": content}],
+            max_tokens=self.vision_max_tokens * len(group),
+            timeout=self.vision_timeout
+        )
+        
+        texts = {}
+        if response.choices and response.choices[0].message.content:
+            texts = _split_pages(response.choices[0].message.content)
+            if response.choices[0].finish_reason == "length" and texts:
+                # The last page in the reply was cut off
+                texts.pop(list(texts)[-1])
+        
+        missing = [img_data for img_data in group if not texts.get(img_data["page_number"])]
+        if missing:
+            logger.info("Batched vision reply incomplete for pages %s; retrying per page",
+                        [img_data["page_number"] for img_data in missing])
+            texts.update(self._extract_page_text(img_data) for img_data in missing)
+        return [(page_number, texts.get(page_number)) for page_number in page_numbers]
+
+    def _extract_page_text(self, img_data):
+        """Extract the text of a single page image, returning (page_number, text)"""
+        # Use OpenRouter's vision capability
+        response = self._create(
+            "extraction",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": _VISION_PROMPT},
+                        _image_content(img_data)
+                    ]
+                }
+            ],
+            max_tokens=self.vision_max_tokens,
+            timeout=self.vision_timeout
+        )
+        
+        if response.choices and response.choices[0].message.content:
+            return img_data["page_number"], response.choices[0].message.content
+        return img_data["page_number"], None
+
+    def _fallback_text_extraction(self, page_count):
+        """Fallback text extraction without vision, for a resume of ``page_count`` pages"""
         try:
             all_text = ""
-            for img_data in resume_images:
-                response = self.client.chat.completions.create(
-                    model="google/gemini-flash-1.5",
+            for _ in range(page_count):
+                response = self._create(
+                    "utility",
                     messages=[
                         {
                             "role": "user",
@@ -135,66 +580,82 @@ class OpenAIClient:
                     all_text += response.choices[0].message.content + "\n\n"
             return all_text
         except Exception as e:
-            return f"Resume with {len(resume_images)} pages. Please ensure your PDF contains selectable text for best results."
+            return f"Resume with {page_count} pages. Please ensure your PDF contains selectable text for best results."
 
-    def _get_analysis_prompt(self, analysis_type, job_description, resume_text):
-        """Get the appropriate prompt for each analysis type"""
-        
-        if analysis_type == "ats_score":
-            return f"""
-            JOB DESCRIPTION:
-            {job_description}
+    def test_connection(self):
+        """Test if the API connection is working"""
+        try:
+            response = self._create(
+                "utility",
+                messages=[{"role": "user", "content": "Say 'Hello' in a creative way."}],
+                max_tokens=20
+            )
+            return True, f"✅ AI connection successful! Model is working."
+        except Exception as e:
+            return False, f"❌ Connection failed: {str(e)}"
 
-            RESUME CONTENT:
-            {resume_text}
 
-            TASK: Analyze this resume against the job description and provide a REAL ATS compatibility score.
+def _image_content(img_data):
+    """Chat message part carrying one page image as a data URL"""
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:{img_data.get('mime_type', 'image/jpeg')};base64,{img_data['data']}"
+        }
+    }
 
-            BE BRUTALLY HONEST. If the resume is terrible, irrelevant, or doesn't match, give a LOW score and explain why.
 
-            SCORING CRITERIA (100 points total):
-            - Skills Match (30 points): How well do resume skills match job requirements?
-            - Experience Relevance (30 points): Is experience relevant, sufficient, and well-described?
-            - Education & Qualifications (15 points): Does education match requirements?
-            - Keyword Usage (15 points): Are important job keywords present and well-integrated?
-            - Overall Fit & Presentation (10 points): General suitability and professionalism
+def _split_pages(text):
+    """Split a batched vision reply on its page markers into {page_number: text}"""
+    markers = list(_PAGE_MARKER.finditer(text))
+    pages = {}
+    for marker, next_marker in zip(markers, markers[1:] + [None]):
+        end = next_marker.start() if next_marker else len(text)
+        page_text = text[marker.end():end].strip()
+        if page_text:
+            pages[int(marker.group(1))] = page_text
+    return pages
 
-            FORMAT YOUR RESPONSE EXACTLY LIKE THIS:
 
-            # 🎯 ATS Compatibility Analysis
+def _cache_value(text, data):
+    """Structured results are cached as their validated JSON, other analyses as rendered text"""
+    return json.dumps(data, ensure_ascii=False) if data is not None else text
 
-            ## Overall Score: [0-100]/100
 
-            ### 📊 Detailed Breakdown:
-            **Skills Match:** [0-30]/30 - [Specific assessment with examples]
-            **Experience Relevance:** [0-30]/30 - [Specific assessment with examples]  
-            **Education & Qualifications:** [0-15]/15 - [Specific assessment with examples]
-            **Keyword Usage:** [0-15]/15 - [Specific assessment with examples]
-            **Overall Fit:** [0-10]/10 - [Specific assessment with examples]
+def _join_pages(pages):
+    """Join {page_number: text} in page order, each page under a ``--- Page N ---`` marker"""
+    return "".join(f"\n\n--- Page {page_number} ---\n{pages[page_number]}" for page_number in sorted(pages))
 
-            ### ⚠️ Critical Issues Found:
-            - [List specific mismatches, missing requirements, or poor quality content]
-            - [Be very specific about what's wrong]
 
-            ### 💡 Improvement Suggestions:
-            - [Actionable suggestions based on actual gaps]
-            - [Provide exact examples of how to improve]
+def _estimate_tokens(messages, tokens_per_image):
+    """Input token count: text parts via ``count_tokens`` plus a flat cost per image"""
+    tokens = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            tokens += count_tokens(content)
+            continue
+        for part in content:
+            if part["type"] == "text":
+                tokens += count_tokens(part["text"])
+            else:
+                tokens += tokens_per_image
+    return tokens
 
-            ### 🔍 Missing Keywords/Skills:
-            - [List important job requirements missing from resume]
-            - [Include both hard and soft skills]
 
-            Base your analysis SOLELY on the actual resume content compared to the job description.
-            """
+def _total_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
 
-    def test_connection(self):
-        """Test if the API connection is working"""
-        try:
-            response = self.client.chat.completions.create(
-                model="google/gemini-flash-1.5",
-                messages=[{"role": "user", "content": "Say 'Hello' in a creative way."}],
-                max_tokens=20
-            )
-            return True, f"✅ AI connection successful! Model is working."
-        except Exception as e:
-            return False, f"❌ Connection failed: {str(e)}"
\ No newline at end of file
+
+def _is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def _get_retry_after(error):
+    response = getattr(error, "response", None)
+    return retry_after_seconds(response.headers if response is not None else None)
@@ -1,13 +1,47 @@
-import streamlit as st
-import os
+import logging
 import tempfile
-from PIL import Image
 import io
+import itertools
+import os
 import base64
+import math
+import re
+import shutil
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import getenv
+
+logger = logging.getLogger(__name__)
 
 class PDFProcessor:
-    def __init__(self):
+    def __init__(self, on_warning=None, on_error=None):
+        # Problems are reported through these hooks; the UI passes st.warning / st.error
+        self.on_warning = on_warning or logger.warning
+        self.on_error = on_error or logger.error
         self.max_file_size = 10 * 1024 * 1024  # 10MB
+        # Pages render once at ``max_dpi``; pages where less than
+        # ``dense_ink_ratio`` is ink are downscaled to ``dpi``, which stays
+        # legible for vision OCR, and dense pages keep full resolution
+        self.dpi = 150
+        self.max_dpi = 200
+        self.dense_ink_ratio = 0.08
+        self.grayscale = True
+        self.crop_margins = True
+        # Encoded pages are kept under this size by lowering quality or scale
+        self.image_max_bytes = int(getenv("PAGE_IMAGE_MAX_KB", "200")) * 1024
+        # Which pages are rasterized: "all", "first_n" or "smart" (see select_pages)
+        self.page_policy = getenv("PDF_PAGE_POLICY", "smart")
+        self.first_n_pages = int(getenv("PDF_FIRST_N_PAGES", "2"))
+        self.max_pages = int(getenv("PDF_MAX_PAGES", "20"))
+        # Pages rendered concurrently; each render is a separate poppler process
+        self.render_workers = int(getenv("PDF_RENDER_WORKERS", "4"))
+        # Below these thresholds the text layer is treated as missing and
+        # pages are rasterized for vision extraction instead; the character
+        # minimum applies to a whole document, ``min_page_chars`` to one page
+        self.min_text_chars = 300
+        self.min_page_chars = 20
+        self.min_readable_ratio = 0.8
 
     def validate_pdf(self, pdf_file):
         """Validate PDF file without external dependencies"""
@@ -33,43 +67,157 @@ class PDFProcessor:
             return False, f"Error validating PDF: {str(e)}"
 
     def convert_pdf_to_images(self, pdf_file):
-        """Convert PDF to images with fallback options"""
+        """Convert PDF to images with fallback options, returning None on failure"""
         try:
-            # Method 1: Try with pdf2image first
-            try:
-                from pdf2image import convert_from_bytes
-                poppler_path = os.getenv("POPPLER_PATH")
-                
-                images = convert_from_bytes(
-                    pdf_file.read(),
-                    poppler_path=poppler_path,
-                    first_page=1,
-                    last_page=2,  # Process max 2 pages for efficiency
-                    dpi=150
-                )
-                
-                image_parts = []
-                for i, image in enumerate(images):
-                    img_byte_arr = io.BytesIO()
-                    image.save(img_byte_arr, format='JPEG', quality=85)
-                    img_byte_arr = img_byte_arr.getvalue()
-                    
-                    image_parts.append({
-                        "mime_type": "image/jpeg",
-                        "data": base64.b64encode(img_byte_arr).decode(),
-                        "page_number": i + 1
-                    })
-                
-                return image_parts
-                
-            except ImportError:
-                st.warning("pdf2image not available. Using fallback method.")
-                return self._fallback_pdf_processing(pdf_file)
-                
+            return list(self.page_images(pdf_file)) or None
         except Exception as e:
-            st.error(f"PDF processing error: {str(e)}")
+            self.on_error(f"PDF processing error: {str(e)}")
             return None
 
+    def page_images(self, pdf_file, skip_pages=()):
+        """Yield page images as they are rendered, with fallback options
+
+        Rendering errors are raised from the generator rather than ending it
+        early, so a consumer never mistakes the pages rendered so far for the
+        whole document.
+        """
+        # Method 1: Try with pdf2image first
+        try:
+            yield from self.iter_page_images(pdf_file, skip_pages)
+            
+        except ImportError:
+            self.on_warning("pdf2image not available. Using fallback method.")
+            yield from self._fallback_pdf_processing(pdf_file) or []
+
+    def iter_page_images(self, pdf_file, skip_pages=()):
+        """Render, encode and yield the selected pages in page order
+
+        The upload is spooled to a temp file and poppler writes each page to
+        disk. Up to ``render_workers`` pages are rendered in parallel, and
+        never more than that are held in memory ahead of the consumer.
+        Pages in ``skip_pages`` (those with a usable text layer) are not
+        rendered, and the ``smart`` policy drops blank pages. Raises
+        ImportError when pdf2image is not installed.
+        """
+        from pdf2image import pdfinfo_from_path
+        poppler_path = getenv("POPPLER_PATH")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            pdf_path = os.path.join(workdir, "upload.pdf")
+            pdf_file.seek(0)
+            with open(pdf_path, "wb") as f:
+                shutil.copyfileobj(pdf_file, f)
+            page_count = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+
+            # pdftoppm runs out of process, so threads render pages in parallel
+            page_numbers = iter(self.select_pages(page_count, skip_pages))
+            workers = max(1, self.render_workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                def submit(page_number):
+                    return executor.submit(self._render_page, pdf_path, workdir, page_number, poppler_path)
+
+                pending = deque(submit(page_number) for page_number in itertools.islice(page_numbers, workers))
+                while pending:
+                    image_part = pending.popleft().result()
+                    next_page = next(page_numbers, None)
+                    if next_page is not None:
+                        pending.append(submit(next_page))
+                    if image_part is not None:
+                        yield image_part
+
+    def select_pages(self, page_count, skip_pages=()):
+        """Return the 1-based page numbers to rasterize
+
+        ``first_n`` keeps the first ``first_n_pages``; ``all`` and ``smart``
+        keep every page. Pages in ``skip_pages`` already have a usable text
+        layer and are left out, so only image-only or unreadable pages
+        reach OCR. ``smart`` also drops pages that render blank (see
+        ``_render_page``). All policies stop at ``max_pages``.
+        """
+        if self.page_policy == "first_n":
+            pages = range(1, min(page_count, self.first_n_pages) + 1)
+        else:
+            pages = range(1, page_count + 1)
+        return [page for page in pages if page not in skip_pages][:self.max_pages]
+
+    def _render_page(self, pdf_path, workdir, page_number, poppler_path):
+        """Render and encode one page, returning None for pages dropped as blank
+
+        Poppler runs once, at ``max_dpi``; sparse pages are then downscaled
+        to ``dpi`` in memory, which is far cheaper than a second render.
+        """
+        from PIL import Image
+
+        path = self._rasterize(pdf_path, workdir, page_number, self.max_dpi, poppler_path)
+        try:
+            with Image.open(path) as image:
+                if self.page_policy == "smart" and _content_box(image) is None:
+                    return None
+                if _ink_ratio(image) >= self.dense_ink_ratio:
+                    # Small type: keep full resolution
+                    return self._image_part(image, page_number)
+                scale = self.dpi / self.max_dpi
+                image = image.resize(
+                    (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                    Image.Resampling.LANCZOS
+                )
+                return self._image_part(image, page_number)
+        finally:
+            os.remove(path)
+
+    def _rasterize(self, pdf_path, workdir, page_number, dpi, poppler_path):
+        """Render one page to an image file in ``workdir`` and return its path"""
+        from pdf2image import convert_from_path
+
+        paths = convert_from_path(
+            pdf_path,
+            poppler_path=poppler_path,
+            first_page=page_number,
+            last_page=page_number,
+            dpi=dpi,
+            grayscale=self.grayscale,
+            output_folder=workdir,
+            paths_only=True
+        )
+        for extra in paths[1:]:
+            os.remove(extra)
+        return paths[0]
+
+    def _image_part(self, image, page_number):
+        mime_type, data = self.encode_page_image(image)
+        return {
+            "mime_type": mime_type,
+            "data": base64.b64encode(data).decode(),
+            "page_number": page_number
+        }
+
+    def encode_page_image(self, image):
+        """Encode a rendered page as compactly as possible, returning (mime_type, bytes)
+
+        Blank margins are cropped, then the page is encoded as JPEG at the
+        highest quality that fits ``image_max_bytes`` (binary search), and
+        replaced by WebP or PNG whenever those come out smaller. Pages that
+        do not fit even at the lowest quality are downscaled and retried.
+        """
+        from PIL import features
+
+        image = image.convert("L" if self.grayscale else "RGB")
+        if self.crop_margins:
+            image = _crop_blank_margins(image)
+
+        for _ in range(3):
+            candidates = [_encode_png(image)]
+            quality, jpeg = _encode_within_budget(image, "JPEG", self.image_max_bytes)
+            candidates.append(("image/jpeg", jpeg))
+            if features.check("webp"):
+                candidates.append(("image/webp", _encode(image, "WEBP", quality=quality)))
+            mime_type, data = min(candidates, key=lambda candidate: len(candidate[1]))
+            if len(data) <= self.image_max_bytes:
+                return mime_type, data
+            scale = math.sqrt(self.image_max_bytes / len(data)) * 0.95
+            image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+        return mime_type, data
+
     def _fallback_pdf_processing(self, pdf_file):
         """Fallback method for PDF processing"""
         try:
@@ -98,27 +246,59 @@ class PDFProcessor:
             }]
             
         except Exception as e:
-            st.error(f"Fallback processing failed: {str(e)}")
+            self.on_error(f"Fallback processing failed: {str(e)}")
             return None
 
-    def extract_text_simple(self, pdf_file):
-        """Simple text extraction without external dependencies"""
+    def extract_page_texts(self, pdf_file):
+        """Extract the embedded text layer of every page, in reading order"""
         try:
-            # Basic text extraction from PDF
             pdf_file.seek(0)
-            content = pdf_file.read().decode('latin-1')
-            
-            # Extract text between text markers (simplified)
-            text_parts = []
-            lines = content.split('\n')
-            for line in lines:
-                if 'Tj' in line or 'TJ' in line:
-                    text_parts.append(line.strip())
-            
-            return ' '.join(text_parts[:500])  # Return first 500 chars
-            
-        except:
-            return "Text extraction not available. Please ensure your PDF contains selectable text."
+            data = pdf_file.read()
+            pdf_file.seek(0)
+            return _TextLayerParser(data).extract_pages()
+        except Exception:
+            return []
+
+    def extract_text(self, pdf_file):
+        """Extract text from the PDF text layer without rendering any pages"""
+        pages = self.extract_page_texts(pdf_file)
+        return "".join(
+            f"\n\n--- Page {i} ---\n{text}"
+            for i, text in enumerate(pages, 1)
+            if text.strip()
+        )
+
+    def has_usable_text(self, text, min_chars=None):
+        """Check whether an extracted text layer is dense enough to skip vision OCR
+
+        ``min_chars`` defaults to ``min_text_chars``, the minimum for a whole document.
+        """
+        content = "".join((text or "").split())
+        if len(content) < (self.min_text_chars if min_chars is None else min_chars) or not content:
+            return False
+        readable = sum(1 for char in content if char.isalnum() or char in _READABLE_PUNCTUATION)
+        return readable / len(content) >= self.min_readable_ratio
+
+    def usable_text_pages(self, page_texts):
+        """Map page numbers to their text for the pages whose text layer is usable on its own"""
+        return {
+            page_number: text
+            for page_number, text in enumerate(page_texts, 1)
+            if self.has_usable_text(text, self.min_page_chars)
+        }
+
+    def extraction_settings(self):
+        """Settings that change the extracted text, used in cache keys"""
+        return {
+            'dpi': (self.dpi, self.max_dpi, self.dense_ink_ratio),
+            'text_layer': (self.min_page_chars, self.min_readable_ratio),
+            'grayscale': self.grayscale,
+            'crop_margins': self.crop_margins,
+            'image_max_bytes': self.image_max_bytes,
+            'page_policy': self.page_policy,
+            'first_n_pages': self.first_n_pages,
+            'max_pages': self.max_pages,
+        }
 
     def get_pdf_info(self, pdf_file):
         """Get basic PDF information"""
@@ -126,4 +306,850 @@ class PDFProcessor:
             'name': pdf_file.name,
             'size': pdf_file.size,
             'type': pdf_file.type
-        }
\ No newline at end of file
+        }
+
+# ---------------------------------------------------------------------------
+# Page image encoding
+# ---------------------------------------------------------------------------
+
+def _encode(image, fmt, **options):
+    output = io.BytesIO()
+    image.save(output, format=fmt, **options)
+    return output.getvalue()
+
+
+def _encode_png(image):
+    return "image/png", _encode(image, "PNG")
+
+
+def _encode_within_budget(image, fmt, max_bytes, min_quality=30, max_quality=90):
+    """Find the highest quality that fits ``max_bytes``, returning (quality, bytes)
+
+    Most pages fit at ``max_quality`` and take a single encode; otherwise
+    the quality is binary-searched, falling back to ``min_quality`` when
+    nothing fits.
+    """
+    data = _encode(image, fmt, quality=max_quality, optimize=True)
+    if len(data) <= max_bytes:
+        return max_quality, data
+    low, high = min_quality, max_quality - 1
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode(image, fmt, quality=quality, optimize=True)
+        if len(data) <= max_bytes:
+            best = (quality, data)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best or (min_quality, _encode(image, fmt, quality=min_quality, optimize=True))
+
+
+def _content_box(image, threshold=245):
+    """Bounding box of the non-white content, or None for a blank page"""
+    return image.convert("L").point(lambda value: 255 if value < threshold else 0).getbbox()
+
+
+def _ink_ratio(image, threshold=245):
+    """Fraction of the page's pixels darker than near-white"""
+    histogram = image.convert("L").histogram()
+    return sum(histogram[:threshold]) / max(1, sum(histogram))
+
+
+def _crop_blank_margins(image, padding=16):
+    """Crop near-white borders, keeping a small padding around the content"""
+    box = _content_box(image)
+    if box is None:
+        return image
+    left, top, right, bottom = box
+    return image.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(image.width, right + padding),
+        min(image.height, bottom + padding),
+    ))
+
+
+# ---------------------------------------------------------------------------
+# Native text-layer extraction
+#
+# Born-digital resumes carry their text in the page content streams, so it can
+# be read directly instead of rasterizing pages and sending them to a vision
+# model. The parser below understands just enough of the PDF format for that:
+# indirect objects (including compressed object streams), Flate/ASCII filters,
+# font encodings and ToUnicode CMaps, the text-showing operators and Form
+# XObjects. Glyph runs are positioned and then reassembled into reading order.
+# ---------------------------------------------------------------------------
+
+_WHITESPACE = b" \t\r\n\x0c\x00"
+_DELIMITERS = b"()<>[]{}/%"
+_OBJECT_HEADER = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_INLINE_IMAGE_END = re.compile(rb"\sEI(?=\s|$)")
+_STRING_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+_READABLE_PUNCTUATION = set(".,;:!?'\"()[]{}-–—_/\\@#&%+*=<>|•·●▪$€£’‘“”")
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+_MISSING = object()
+
+# Glyph names from font /Differences arrays that are not a single character
+_GLYPH_NAMES = {
+    "space": " ", "exclam": "!", "quotedbl": '"', "numbersign": "#", "dollar": "$",
+    "percent": "%", "ampersand": "&", "quotesingle": "'", "quoteright": "’",
+    "quoteleft": "‘", "quotedblleft": "“", "quotedblright": "”", "parenleft": "(",
+    "parenright": ")", "asterisk": "*", "plus": "+", "comma": ",", "hyphen": "-",
+    "period": ".", "slash": "/", "colon": ":", "semicolon": ";", "less": "<",
+    "equal": "=", "greater": ">", "question": "?", "at": "@", "bracketleft": "[",
+    "backslash": "\\", "bracketright": "]", "underscore": "_", "bar": "|",
+    "braceleft": "{", "braceright": "}", "endash": "–", "emdash": "—",
+    "bullet": "•", "periodcentered": "·", "ellipsis": "…", "fi": "fi", "fl": "fl",
+    "ff": "ff", "ffi": "ffi", "ffl": "ffl", "zero": "0", "one": "1", "two": "2",
+    "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7", "eight": "8",
+    "nine": "9", "eacute": "é", "egrave": "è", "aacute": "á", "agrave": "à",
+    "oacute": "ó", "uacute": "ú", "iacute": "í", "ntilde": "ñ", "ccedilla": "ç",
+    "odieresis": "ö", "udieresis": "ü", "adieresis": "ä", "germandbls": "ß",
+}
+
+
+class _Name(str):
+    """PDF name object such as ``/Font``"""
+
+
+class _Keyword(str):
+    """Bare PDF keyword or content-stream operator"""
+
+
+class _Ref(tuple):
+    """Indirect object reference such as ``12 0 R``"""
+
+
+class _Stream:
+    def __init__(self, header, raw):
+        self.header = header
+        self.raw = raw
+
+
+class _Run:
+    __slots__ = ("x", "end_x", "y", "size", "text")
+
+    def __init__(self, x, end_x, y, size, text):
+        self.x = x
+        self.end_x = end_x
+        self.y = y
+        self.size = size
+        self.text = text
+
+
+def _is_keyword(token, value):
+    return isinstance(token, _Keyword) and token == value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _multiply(m, n):
+    """Multiply two PDF transformation matrices (``m`` applied first)"""
+    a1, b1, c1, d1, e1, f1 = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a1 * a2 + b1 * c2,
+        a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2,
+        c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2,
+        e1 * b2 + f1 * d2 + f2,
+    )
+
+
+def _inflate(data):
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        # Tolerate truncated streams and trailing garbage after the zlib data
+        try:
+            return zlib.decompressobj().decompress(data)
+        except zlib.error:
+            return b""
+
+
+def _glyph_to_unicode(name):
+    if len(name) == 1:
+        return name
+    if name in _GLYPH_NAMES:
+        return _GLYPH_NAMES[name]
+    match = re.fullmatch(r"uni([0-9A-Fa-f]{4})+|u([0-9A-Fa-f]{4,6})", name)
+    if match:
+        digits = name[3:] if name.startswith("uni") else name[1:]
+        step = 4 if name.startswith("uni") else len(digits)
+        try:
+            return "".join(chr(int(digits[i:i + step], 16)) for i in range(0, len(digits), step))
+        except ValueError:
+            return ""
+    return ""
+
+
+class _Lexer:
+    """Tokenizer shared by object, content-stream and CMap parsing"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def next_token(self):
+        data = self.data
+        size = len(data)
+        while self.pos < size:
+            char = data[self.pos]
+            if char in _WHITESPACE:
+                self.pos += 1
+            elif char == 0x25:  # % comment runs to end of line
+                while self.pos < size and data[self.pos] not in b"\r\n":
+                    self.pos += 1
+            else:
+                break
+        if self.pos >= size:
+            return None
+
+        char = data[self.pos:self.pos + 1]
+        if char == b"(":
+            return self._read_literal_string()
+        if char == b"<":
+            if data[self.pos + 1:self.pos + 2] == b"<":
+                self.pos += 2
+                return _Keyword("<<")
+            return self._read_hex_string()
+        if char == b">":
+            if data[self.pos + 1:self.pos + 2] == b">":
+                self.pos += 2
+                return _Keyword(">>")
+            self.pos += 1
+            return _Keyword(">")
+        if char == b"/":
+            return self._read_name()
+
+        start = self.pos
+        while self.pos < size and data[self.pos] not in _WHITESPACE and data[self.pos] not in _DELIMITERS:
+            self.pos += 1
+        if self.pos == start:
+            # Array brackets and stray delimiters are single-character tokens
+            self.pos += 1
+            return _Keyword(char.decode("latin-1"))
+        word = data[start:self.pos]
+        if _NUMBER.fullmatch(word):
+            return float(word) if b"." in word else int(word)
+        return _Keyword(word.decode("latin-1"))
+
+    def _read_literal_string(self):
+        data = self.data
+        size = len(data)
+        self.pos += 1
+        depth = 1
+        out = bytearray()
+        while self.pos < size:
+            char = data[self.pos]
+            self.pos += 1
+            if char == 0x5C:  # backslash escape
+                if self.pos >= size:
+                    break
+                escaped = data[self.pos]
+                self.pos += 1
+                if escaped in _STRING_ESCAPES:
+                    out += _STRING_ESCAPES[escaped]
+                elif 0x30 <= escaped <= 0x37:
+                    digits = chr(escaped)
+                    while len(digits) < 3 and self.pos < size and 0x30 <= data[self.pos] <= 0x37:
+                        digits += chr(data[self.pos])
+                        self.pos += 1
+                    out.append(int(digits, 8) & 0xFF)
+                elif escaped == 0x0D:
+                    if self.pos < size and data[self.pos] == 0x0A:
+                        self.pos += 1
+                elif escaped != 0x0A:
+                    out.append(escaped)
+            elif char == 0x28:
+                depth += 1
+                out.append(char)
+            elif char == 0x29:
+                depth -= 1
+                if depth == 0:
+                    break
+                out.append(char)
+            else:
+                out.append(char)
+        return bytes(out)
+
+    def _read_hex_string(self):
+        end = self.data.find(b">", self.pos)
+        if end < 0:
+            end = len(self.data)
+        digits = re.sub(rb"[^0-9A-Fa-f]", b"", self.data[self.pos + 1:end])
+        self.pos = end + 1
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii"))
+
+    def _read_name(self):
+        data = self.data
+        self.pos += 1
+        start = self.pos
+        while self.pos < len(data) and data[self.pos] not in _WHITESPACE and data[self.pos] not in _DELIMITERS:
+            self.pos += 1
+        raw = data[start:self.pos]
+        if b"#" in raw:
+            raw = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw)
+        return _Name(raw.decode("latin-1"))
+
+
+def _parse_object(lexer, token=_MISSING):
+    """Parse one PDF object, returning dicts, lists, bytes, numbers, names or refs"""
+    if token is _MISSING:
+        token = lexer.next_token()
+
+    if isinstance(token, _Keyword):
+        if token == "<<":
+            result = {}
+            while True:
+                key = lexer.next_token()
+                if key is None or _is_keyword(key, ">>"):
+                    return result
+                value = _parse_object(lexer)
+                if isinstance(key, _Name):
+                    result[str(key)] = value
+        if token == "[":
+            items = []
+            while True:
+                item = lexer.next_token()
+                if item is None or _is_keyword(item, "]"):
+                    return items
+                items.append(_parse_object(lexer, item))
+        if token == "true":
+            return True
+        if token == "false":
+            return False
+        if token == "null":
+            return None
+        return token
+
+    if isinstance(token, int):
+        saved = lexer.pos
+        generation = lexer.next_token()
+        if isinstance(generation, int) and _is_keyword(lexer.next_token(), "R"):
+            return _Ref((token, generation))
+        lexer.pos = saved
+    return token
+
+
+class _Font:
+    """Maps the bytes of shown strings to Unicode text and glyph widths"""
+
+    def __init__(self, parser=None, font=None):
+        font = font or {}
+        self.two_byte = font.get("Subtype") == "Type0"
+        self.to_unicode = {}
+        self.differences = {}
+        self.codec = "cp1252"
+        self.widths = {}
+        self.default_width = 1000 if self.two_byte else 500
+        if parser is None:
+            return
+
+        to_unicode = parser.resolve(font.get("ToUnicode"))
+        if isinstance(to_unicode, _Stream):
+            cmap = parser.decode_stream(to_unicode)
+            if cmap:
+                self._load_cmap(cmap)
+
+        if self.two_byte:
+            descendants = parser.resolve(font.get("DescendantFonts"))
+            descendant = parser.resolve(descendants[0]) if isinstance(descendants, list) and descendants else None
+            if isinstance(descendant, dict):
+                default_width = parser.resolve(descendant.get("DW"))
+                if _is_number(default_width):
+                    self.default_width = default_width
+                self._load_cid_widths(parser, parser.resolve(descendant.get("W")))
+        else:
+            first_char = parser.resolve(font.get("FirstChar"))
+            widths = parser.resolve(font.get("Widths"))
+            if isinstance(first_char, int) and isinstance(widths, list):
+                for offset, width in enumerate(widths):
+                    width = parser.resolve(width)
+                    if _is_number(width):
+                        self.widths[first_char + offset] = width
+            self._load_encoding(parser, parser.resolve(font.get("Encoding")))
+
+    def _load_cmap(self, data):
+        lexer = _Lexer(data)
+        while True:
+            token = lexer.next_token()
+            if token is None:
+                return
+            if _is_keyword(token, "beginbfchar"):
+                while True:
+                    source = lexer.next_token()
+                    if not isinstance(source, bytes):
+                        break
+                    target = _parse_object(lexer)
+                    if isinstance(target, bytes):
+                        self.to_unicode[int.from_bytes(source, "big")] = target.decode("utf-16-be", "ignore")
+            elif _is_keyword(token, "beginbfrange"):
+                while True:
+                    low = lexer.next_token()
+                    if not isinstance(low, bytes):
+                        break
+                    high = _parse_object(lexer)
+                    target = _parse_object(lexer)
+                    if not isinstance(high, bytes):
+                        continue
+                    self._load_cmap_range(int.from_bytes(low, "big"), int.from_bytes(high, "big"), target)
+
+    def _load_cmap_range(self, low, high, target):
+        # Guard against malformed ranges spanning the whole code space
+        high = min(high, low + 0xFFFF)
+        if isinstance(target, list):
+            for code, item in zip(range(low, high + 1), target):
+                if isinstance(item, bytes):
+                    self.to_unicode[code] = item.decode("utf-16-be", "ignore")
+        elif isinstance(target, bytes) and target:
+            base = int.from_bytes(target, "big")
+            for offset, code in enumerate(range(low, high + 1)):
+                value = (base + offset).to_bytes(len(target), "big")
+                self.to_unicode[code] = value.decode("utf-16-be", "ignore")
+
+    def _load_cid_widths(self, parser, widths):
+        if not isinstance(widths, list):
+            return
+        items = [parser.resolve(item) for item in widths]
+        index = 0
+        while index + 1 < len(items):
+            first = items[index]
+            if isinstance(items[index + 1], list):
+                for offset, width in enumerate(items[index + 1]):
+                    if isinstance(first, int) and _is_number(width):
+                        self.widths[first + offset] = width
+                index += 2
+            elif index + 2 < len(items):
+                last, width = items[index + 1], items[index + 2]
+                if isinstance(first, int) and isinstance(last, int) and _is_number(width):
+                    for code in range(first, min(last, first + 0xFFFF) + 1):
+                        self.widths[code] = width
+                index += 3
+            else:
+                break
+
+    def _load_encoding(self, parser, encoding):
+        base = encoding
+        if isinstance(encoding, dict):
+            base = encoding.get("BaseEncoding")
+            code = None
+            for item in parser.resolve(encoding.get("Differences")) or []:
+                if isinstance(item, int):
+                    code = item
+                elif isinstance(item, _Name) and code is not None:
+                    char = _glyph_to_unicode(item)
+                    if char:
+                        self.differences[code] = char
+                    code += 1
+        if base == "MacRomanEncoding":
+            self.codec = "mac_roman"
+
+    def decode(self, raw):
+        """Split a shown string into character codes and their text"""
+        step = 2 if self.two_byte else 1
+        codes, chars = [], []
+        for index in range(0, len(raw) - step + 1, step):
+            code = int.from_bytes(raw[index:index + step], "big")
+            codes.append(code)
+            if code in self.to_unicode:
+                chars.append(self.to_unicode[code])
+            elif self.two_byte or code < 32:
+                # Unmapped glyph ids carry no meaning; keep a marker so sparse
+                # or garbled text layers fail the readability check
+                chars.append("\ufffd")
+            elif code in self.differences:
+                chars.append(self.differences[code])
+            else:
+                chars.append(bytes([code]).decode(self.codec, "replace"))
+        return codes, chars
+
+    def width(self, code):
+        return self.widths.get(code, self.default_width) / 1000.0
+
+
+_DEFAULT_FONT = _Font()
+
+
+class _TextLayerParser:
+    """Reads the text layer of a PDF document held in memory"""
+
+    def __init__(self, data):
+        self.data = data
+        self.objects = {}
+        self._fonts = {}
+        self._load_objects()
+
+    def _load_objects(self):
+        data = self.data
+        skip_until = 0
+        for match in _OBJECT_HEADER.finditer(data):
+            # Ignore "obj" byte sequences that occur inside stream data
+            if match.start() < skip_until:
+                continue
+            lexer = _Lexer(data, match.end())
+            try:
+                obj = _parse_object(lexer)
+            except (ValueError, IndexError, RecursionError):
+                continue
+            after = _Lexer(data, lexer.pos)
+            if isinstance(obj, dict) and _is_keyword(after.next_token(), "stream"):
+                start = after.pos
+                if data[start:start + 2] == b"\r\n":
+                    start += 2
+                elif data[start:start + 1] in (b"\r", b"\n"):
+                    start += 1
+                end = self._stream_end(obj, start)
+                obj = _Stream(obj, data[start:end])
+                skip_until = end
+            # Later definitions win, which matches incremental-update semantics
+            self.objects[int(match.group(1))] = obj
+
+        for obj in list(self.objects.values()):
+            if isinstance(obj, _Stream) and obj.header.get("Type") == "ObjStm":
+                self._load_object_stream(obj)
+
+    def _stream_end(self, header, start):
+        length = header.get("Length")
+        if isinstance(length, int) and length >= 0:
+            end = start + length
+            if self.data[end:end + 32].lstrip(_WHITESPACE).startswith(b"endstream"):
+                return end
+        end = self.data.find(b"endstream", start)
+        return end if end >= 0 else len(self.data)
+
+    def _load_object_stream(self, stream):
+        data = self.decode_stream(stream)
+        first = stream.header.get("First")
+        count = stream.header.get("N")
+        if not data or not isinstance(first, int) or not isinstance(count, int):
+            return
+        lexer = _Lexer(data)
+        header = [lexer.next_token() for _ in range(count * 2)]
+        for index in range(0, len(header) - 1, 2):
+            number, offset = header[index], header[index + 1]
+            if not isinstance(number, int) or not isinstance(offset, int) or number in self.objects:
+                continue
+            try:
+                self.objects[number] = _parse_object(_Lexer(data, first + offset))
+            except (ValueError, IndexError, RecursionError):
+                continue
+
+    def resolve(self, obj):
+        for _ in range(32):
+            if not isinstance(obj, _Ref):
+                return obj
+            obj = self.objects.get(obj[0])
+        return None
+
+    def decode_stream(self, stream):
+        """Apply the stream's filters, or return None for unsupported ones"""
+        filters = self.resolve(stream.header.get("Filter"))
+        if filters is None:
+            filters = []
+        elif not isinstance(filters, list):
+            filters = [filters]
+
+        data = stream.raw
+        for name in filters:
+            name = self.resolve(name)
+            if name in ("FlateDecode", "Fl"):
+                data = _inflate(data)
+            elif name in ("ASCIIHexDecode", "AHx"):
+                digits = re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0])
+                data = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+            elif name in ("ASCII85Decode", "A85"):
+                body = data.strip()
+                if body.startswith(b"<~"):
+                    body = body[2:]
+                body = body.split(b"~>")[0]
+                try:
+                    data = base64.a85decode(body + b"~>", adobe=True)
+                except ValueError:
+                    return None
+            else:
+                return None
+        return data
+
+    def pages(self):
+        """Return ``(page, resources)`` pairs in document order"""
+        catalog = None
+        for obj in self.objects.values():
+            if isinstance(obj, dict) and obj.get("Type") == "Catalog":
+                catalog = obj
+
+        pages = []
+        if catalog is not None:
+            self._walk_page_tree(self.resolve(catalog.get("Pages")), None, pages, set())
+        if not pages:
+            for number in sorted(self.objects):
+                obj = self.objects[number]
+                if isinstance(obj, dict) and obj.get("Type") == "Page":
+                    pages.append((obj, self.resolve(obj.get("Resources"))))
+        return pages
+
+    def _walk_page_tree(self, node, inherited, pages, seen):
+        if not isinstance(node, dict) or id(node) in seen:
+            return
+        seen.add(id(node))
+        resources = self.resolve(node.get("Resources")) or inherited
+        kids = self.resolve(node.get("Kids"))
+        if node.get("Type") == "Page" or not isinstance(kids, list):
+            pages.append((node, resources))
+            return
+        for kid in kids:
+            self._walk_page_tree(self.resolve(kid), resources, pages, seen)
+
+    def extract_pages(self):
+        texts = []
+        for page, resources in self.pages():
+            try:
+                runs = []
+                contents = self.resolve(page.get("Contents"))
+                if not isinstance(contents, list):
+                    contents = [contents]
+                chunks = []
+                for item in contents:
+                    stream = self.resolve(item)
+                    if isinstance(stream, _Stream):
+                        chunks.append(self.decode_stream(stream) or b"")
+                self._run_content(b"\n".join(chunks), resources, _IDENTITY, runs, 0)
+                texts.append(_assemble_page_text(runs))
+            except (ValueError, IndexError, RecursionError, ZeroDivisionError):
+                texts.append("")
+        return texts
+
+    def _font_table(self, resources):
+        fonts = self.resolve(resources.get("Font")) if isinstance(resources, dict) else None
+        table = {}
+        for name, ref in (fonts or {}).items():
+            key = ref if isinstance(ref, _Ref) else id(ref)
+            if key not in self._fonts:
+                font = self.resolve(ref)
+                self._fonts[key] = _Font(self, font) if isinstance(font, dict) else _DEFAULT_FONT
+            table[name] = self._fonts[key]
+        return table
+
+    def _run_content(self, data, resources, ctm, runs, depth):
+        """Interpret a content stream, appending positioned text runs"""
+        fonts = self._font_table(resources)
+        xobjects = self.resolve(resources.get("XObject")) if isinstance(resources, dict) else None
+        lexer = _Lexer(data)
+        operands = []
+        saved_states = []
+        font, size = _DEFAULT_FONT, 0.0
+        spacing = {"char": 0.0, "word": 0.0, "scale": 1.0}
+        leading = 0.0
+        tm = lm = _IDENTITY
+
+        while True:
+            token = lexer.next_token()
+            if token is None:
+                break
+            if not isinstance(token, _Keyword) or token in ("<<", "["):
+                operands.append(_parse_object(lexer, token))
+                continue
+
+            op = str(token)
+            numbers = [float(value) for value in operands if _is_number(value)]
+            if op == "q":
+                saved_states.append((ctm, font, size, dict(spacing), leading))
+            elif op == "Q":
+                if saved_states:
+                    ctm, font, size, spacing, leading = saved_states.pop()
+            elif op == "cm" and len(numbers) >= 6:
+                ctm = _multiply(tuple(numbers[-6:]), ctm)
+            elif op == "BT":
+                tm = lm = _IDENTITY
+            elif op == "Tf" and operands:
+                font = fonts.get(str(operands[0]), _DEFAULT_FONT)
+                size = numbers[-1] if numbers else size
+            elif op == "Tc" and numbers:
+                spacing["char"] = numbers[-1]
+            elif op == "Tw" and numbers:
+                spacing["word"] = numbers[-1]
+            elif op == "Tz" and numbers:
+                spacing["scale"] = numbers[-1] / 100.0
+            elif op == "TL" and numbers:
+                leading = numbers[-1]
+            elif op in ("Td", "TD") and len(numbers) >= 2:
+                if op == "TD":
+                    leading = -numbers[-1]
+                lm = tm = _multiply((1.0, 0.0, 0.0, 1.0, numbers[-2], numbers[-1]), lm)
+            elif op == "Tm" and len(numbers) >= 6:
+                lm = tm = tuple(numbers[-6:])
+            elif op in ("T*", "'", '"'):
+                lm = tm = _multiply((1.0, 0.0, 0.0, 1.0, 0.0, -leading), lm)
+                if op == '"' and len(numbers) >= 2:
+                    spacing["word"], spacing["char"] = numbers[-2], numbers[-1]
+                if op != "T*" and operands and isinstance(operands[-1], bytes):
+                    tm = self._show_text(operands[-1], font, size, spacing, tm, ctm, runs)
+            elif op == "Tj" and operands and isinstance(operands[-1], bytes):
+                tm = self._show_text(operands[-1], font, size, spacing, tm, ctm, runs)
+            elif op == "TJ" and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        tm = self._show_text(item, font, size, spacing, tm, ctm, runs)
+                    elif _is_number(item):
+                        shift = -item / 1000.0 * size * spacing["scale"]
+                        tm = _multiply((1.0, 0.0, 0.0, 1.0, shift, 0.0), tm)
+            elif op == "Do" and operands and isinstance(xobjects, dict) and depth < 8:
+                xobject = self.resolve(xobjects.get(str(operands[-1])))
+                if isinstance(xobject, _Stream) and xobject.header.get("Subtype") == "Form":
+                    matrix = self.resolve(xobject.header.get("Matrix"))
+                    if not (isinstance(matrix, list) and len(matrix) == 6 and all(map(_is_number, matrix))):
+                        matrix = _IDENTITY
+                    form_resources = self.resolve(xobject.header.get("Resources")) or resources
+                    content = self.decode_stream(xobject) or b""
+                    self._run_content(content, form_resources, _multiply(tuple(matrix), ctm), runs, depth + 1)
+            elif op == "ID":
+                # Skip binary inline image data up to the closing EI operator
+                match = _INLINE_IMAGE_END.search(data, lexer.pos)
+                lexer.pos = match.end() if match else len(data)
+            operands = []
+
+    def _show_text(self, raw, font, size, spacing, tm, ctm, runs):
+        codes, chars = font.decode(raw)
+        advance = 0.0
+        for code, char in zip(codes, chars):
+            width = font.width(code) * size + spacing["char"]
+            if char == " " and not font.two_byte:
+                width += spacing["word"]
+            advance += width * spacing["scale"]
+
+        start = _multiply(tm, ctm)
+        tm = _multiply((1.0, 0.0, 0.0, 1.0, advance, 0.0), tm)
+        end = _multiply(tm, ctm)
+        text = "".join(chars)
+        if text.strip():
+            rendered_size = abs(size) * math.hypot(start[2], start[3])
+            runs.append(_Run(start[4], end[4], start[5], max(rendered_size, 1.0), text))
+        return tm
+
+
+def _assemble_lines(runs):
+    """Group runs into lines, each a list of horizontal segments"""
+    runs = sorted(runs, key=lambda run: (-run.y, run.x))
+    rows = []
+    for run in runs:
+        if rows and abs(rows[-1][0].y - run.y) <= 0.5 * min(rows[-1][0].size, run.size):
+            rows[-1].append(run)
+        else:
+            rows.append([run])
+
+    lines = []
+    for row in rows:
+        row.sort(key=lambda run: run.x)
+        segments = []
+        previous = None
+        for run in row:
+            if previous is not None:
+                # Drop duplicated runs used to fake bold text
+                if run.text == previous.text and abs(run.x - previous.x) < 0.2 * run.size:
+                    continue
+                gap = run.x - previous.end_x
+                if gap > 2.5 * run.size:
+                    segments.append(_Run(run.x, run.end_x, run.y, run.size, run.text))
+                else:
+                    segment = segments[-1]
+                    joiner = ""
+                    if gap > 0.15 * run.size and not segment.text.endswith(" ") and not run.text.startswith(" "):
+                        joiner = " "
+                    segment.text += joiner + run.text
+                    segment.end_x = max(segment.end_x, run.end_x)
+            else:
+                segments.append(_Run(run.x, run.end_x, run.y, run.size, run.text))
+            previous = run
+        for segment in segments:
+            segment.text = " ".join(segment.text.split())
+        lines.append(segments)
+    return lines
+
+
+def _find_column_gutter(lines):
+    """Return the x position separating two text columns, if the page has them"""
+    segments = [segment for line in lines for segment in line]
+    if len(segments) < 8:
+        return None
+    left = min(segment.x for segment in segments)
+    right = max(segment.end_x for segment in segments)
+    if right - left <= 0:
+        return None
+
+    bins = 100
+    scale = bins / (right - left)
+    coverage = [0] * bins
+    for segment in segments:
+        first = max(0, int((segment.x - left) * scale))
+        last = min(bins - 1, int((segment.end_x - left) * scale))
+        for index in range(first, last + 1):
+            coverage[index] += 1
+
+    tolerance = max(1, len(segments) // 20)
+    best, start = None, None
+    for index in range(15, 86):
+        if coverage[index] <= tolerance:
+            start = index if start is None else start
+            continue
+        if start is not None and (best is None or index - start > best[1] - best[0]):
+            best = (start, index)
+        start = None
+    if best is None or best[1] - best[0] < 2:
+        return None
+
+    gutter = left + (best[0] + best[1]) / 2 / scale
+    left_column = [s for s in segments if s.end_x <= gutter]
+    right_column = [s for s in segments if s.x >= gutter]
+    if len(left_column) < 3 or len(right_column) < 3:
+        return None
+    # Right-aligned annotations (dates, locations) share rows with the main
+    # text rather than forming a column of their own
+    if _alignment([s.end_x for s in right_column]) > _alignment([s.x for s in right_column]):
+        return None
+    right_chars = sum(len(s.text) for s in right_column)
+    if right_chars < 0.15 * sum(len(s.text) for s in segments):
+        return None
+    return gutter
+
+
+def _alignment(values):
+    """Share of positions that line up on the most common edge"""
+    counts = {}
+    for value in values:
+        key = round(value / 2)
+        counts[key] = counts.get(key, 0) + 1
+    return max(counts.values()) / len(values)
+
+
+def _assemble_page_text(runs):
+    """Rebuild the page text in reading order, handling two-column layouts"""
+    lines = _assemble_lines(runs)
+    gutter = _find_column_gutter(lines)
+    if gutter is None:
+        return "\n".join("   ".join(segment.text for segment in line) for line in lines)
+
+    # Full-width rows split the page into bands; inside each band the left
+    # column is read before the right one
+    output, left, right = [], [], []
+    for line in lines:
+        spanning = [segment for segment in line if segment.x < gutter < segment.end_x]
+        if spanning:
+            output.extend(left + right)
+            left, right = [], []
+            output.append("   ".join(segment.text for segment in line))
+            continue
+        left_text = "   ".join(segment.text for segment in line if segment.end_x <= gutter)
+        right_text = "   ".join(segment.text for segment in line if segment.x >= gutter)
+        if left_text:
+            left.append(left_text)
+        if right_text:
+            right.append(right_text)
+    output.extend(left + right)
+    return "\n".join(output)
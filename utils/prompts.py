@@ -0,0 +1,153 @@
+import functools
+import textwrap
+from utils.tokens import count_tokens
+
+SYSTEM_PROMPT = "You are an expert resume analyst and career coach. Be brutally honest and provide specific, actionable feedback."
+
+# Every analysis prompt starts with the same instructions and ends with the
+# request data, so repeated analyses share a long identical prefix that
+# provider-side prompt caching can reuse
+SHARED_INSTRUCTIONS = """\
+You compare a candidate's resume with a job description. Both are given at the end of this message.
+
+RULES:
+- Base your analysis SOLELY on the actual resume content compared to the job description.
+- BE BRUTALLY HONEST. If the resume is weak, irrelevant, or doesn't match, say so plainly.
+- Be specific: refer to concrete lines of the resume and requirements of the job description.
+- Never invent experience, skills, or qualifications the resume does not show."""
+
+
+class PromptTemplate:
+    """A versioned analysis prompt, compiled once into its static prefix
+
+    Rendering only appends the job description and resume, so the prefix
+    (shared instructions, then the task) is byte-identical across requests.
+    """
+
+    def __init__(self, name, version, instructions):
+        self.name = name
+        self.version = version
+        self.key = f"{name}@{version}"
+        self.prefix = f"{SHARED_INSTRUCTIONS}\n\n{textwrap.dedent(instructions).strip()}\n\n"
+
+    @functools.cached_property
+    def prefix_tokens(self):
+        # Counted on first use so importing the registry stays cheap
+        return count_tokens(SYSTEM_PROMPT) + count_tokens(self.prefix)
+
+    def render(self, job_description, resume_text):
+        return f"{self.prefix}JOB DESCRIPTION:\n{job_description}\n\nRESUME CONTENT:\n{resume_text}\n"
+
+    def estimate_tokens(self, job_description="", resume_text=""):
+        """Estimated input tokens of a request, including the system prompt"""
+        return self.prefix_tokens + count_tokens(job_description) + count_tokens(resume_text)
+
+
+ATS_SCORE = PromptTemplate("ats_score", 2, """
+    TASK: Analyze this resume against the job description and provide a REAL ATS compatibility score.
+
+    SCORING CRITERIA (100 points total):
+    - Skills Match (30 points): How well do resume skills match job requirements?
+    - Experience Relevance (30 points): Is experience relevant, sufficient, and well-described?
+    - Education & Qualifications (15 points): Does education match requirements?
+    - Keyword Usage (15 points): Are important job keywords present and well-integrated?
+    - Overall Fit & Presentation (10 points): General suitability and professionalism
+
+    RESPOND WITH A SINGLE JSON OBJECT ONLY, with "overall_score" as the first key:
+    {
+      "overall_score": [0-100],
+      "breakdown": {
+        "skills_match": {"score": [0-30], "assessment": "[Specific assessment with examples]"},
+        "experience_relevance": {"score": [0-30], "assessment": "[Specific assessment with examples]"},
+        "education": {"score": [0-15], "assessment": "[Specific assessment with examples]"},
+        "keyword_usage": {"score": [0-15], "assessment": "[Specific assessment with examples]"},
+        "overall_fit": {"score": [0-10], "assessment": "[Specific assessment with examples]"}
+      },
+      "critical_issues": ["[Specific mismatches, missing requirements, or poor quality content]"],
+      "improvement_suggestions": ["[Actionable suggestions with exact examples of how to improve]"],
+      "missing_keywords": ["[Important job requirements missing from the resume, hard and soft skills]"]
+    }
+""")
+
+PERSONALITY_ANALYSIS = PromptTemplate("personality_analysis", 1, """
+    TASK: Infer the candidate's professional profile from the writing style and content of the resume, and relate it to the role.
+
+    FORMAT YOUR RESPONSE EXACTLY LIKE THIS:
+
+    # 👤 Professional Profile Analysis
+
+    ### 🧭 Professional Summary:
+    [2-3 sentences describing the candidate as the resume presents them]
+
+    ### 💪 Key Traits:
+    - **[Trait]:** [Evidence from the resume]
+
+    ### ✍️ Communication Style:
+    - [Clarity, tone, use of metrics and action verbs]
+
+    ### 📈 Career Progression:
+    - [Trajectory, growth, gaps or pivots visible in the experience]
+
+    ### 🤝 Fit With This Role:
+    - [How the profile matches the role's responsibilities, seniority and working style]
+
+    ### ⚠️ Red Flags:
+    - [Anything a recruiter would question, or "None identified"]
+""")
+
+MISSING_KEYWORDS = PromptTemplate("missing_keywords", 1, """
+    TASK: Identify the keywords and skills the job description asks for that the resume lacks or under-uses.
+
+    FORMAT YOUR RESPONSE EXACTLY LIKE THIS:
+
+    # 🔑 Missing Keywords Analysis
+
+    ### ❌ Missing Hard Skills:
+    - **[Keyword]:** [Where the job description asks for it]
+
+    ### ❌ Missing Soft Skills:
+    - **[Keyword]:** [Where the job description asks for it]
+
+    ### ⚠️ Weakly Represented:
+    - **[Keyword]:** [Where it appears in the resume and how to strengthen it]
+
+    ### ✅ Already Matched:
+    - [Important job keywords the resume already covers]
+
+    ### 💡 Where To Add Them:
+    - [Specific resume sections or bullet points to update, with example wording]
+""")
+
+RESUME_OPTIMIZATION = PromptTemplate("resume_optimization", 1, """
+    TASK: Suggest concrete changes that would make this resume a stronger application for this job.
+
+    FORMAT YOUR RESPONSE EXACTLY LIKE THIS:
+
+    # 💡 Resume Optimization Suggestions
+
+    ### 🎯 Top Priorities:
+    1. [Most impactful change, with an example]
+    2. [Next most impactful change, with an example]
+    3. [Third change, with an example]
+
+    ### ✏️ Bullet Point Rewrites:
+    - **Before:** [Original bullet from the resume]
+      **After:** [Improved bullet tailored to the job, with measurable results]
+
+    ### 🧱 Structure & Formatting:
+    - [Section order, length, readability and ATS-friendly formatting]
+
+    ### 📝 Tailored Summary:
+    [A 2-3 sentence professional summary the candidate could use for this job]
+""")
+
+# Loaded once at import; analysis types map to their current template
+PROMPTS = {
+    template.name: template
+    for template in (ATS_SCORE, PERSONALITY_ANALYSIS, MISSING_KEYWORDS, RESUME_OPTIMIZATION)
+}
+
+
+def get_prompt_template(analysis_type):
+    """Return the template for ``analysis_type``, or None when there is none"""
+    return PROMPTS.get(analysis_type)
@@ -0,0 +1,187 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from utils.config import getenv
+
+logger = logging.getLogger(__name__)
+
+# Requests are queued fairly per session; worker threads inherit the
+# caller's session by running in a copy of its context
+_session = contextvars.ContextVar("request_session", default="default")
+
+
+def current_session():
+    return _session.get()
+
+
+def set_session(session):
+    """Attribute the current thread's requests to ``session`` (for Streamlit scripts)"""
+    _session.set(session)
+
+
+def retry_after_seconds(headers):
+    """Parse ``Retry-After`` / ``retry-after-ms`` response headers, or None"""
+    if not headers:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds:
+        try:
+            return float(milliseconds) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Continuously refilling budget of ``per_minute`` units"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available (requests larger than the bucket wait for a full one)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Correct an earlier estimate once the real usage is known"""
+        self._refill()
+        self.level -= amount
+
+
+class RequestScheduler:
+    """Admit API requests within RPM/TPM budgets, retrying transient failures
+
+    Waiting requests are admitted round-robin across sessions, so one
+    session's burst (e.g. a batch run) cannot starve interactive users.
+    Retries use jittered exponential backoff, or the server's Retry-After
+    delay when given, which also pauses every other request. A Retry-After
+    longer than ``max_delay`` is not waited for: the error is raised so the
+    caller (e.g. the model router) can move on.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_retries=4,
+                 base_delay=1.0, max_delay=30.0, is_retryable=None, get_retry_after=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.is_retryable = is_retryable or (lambda error: False)
+        self.get_retry_after = get_retry_after or (lambda error: None)
+        self._queues = OrderedDict()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def call(self, request, tokens=0, usage=None):
+        """Run ``request()`` once admitted, retrying retryable errors
+
+        ``tokens`` is the estimated token cost; ``usage(result)`` may return
+        the actual count to correct the TPM budget afterwards.
+        """
+        session = current_session()
+        for attempt in range(self.max_retries + 1):
+            self._acquire(session, tokens)
+            try:
+                result = request()
+            except Exception as e:
+                if attempt == self.max_retries or not self.is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                if delay is None:
+                    raise
+                logger.info("Retrying request in %.1fs after %s (attempt %d)", delay, e, attempt + 1)
+                time.sleep(delay)
+                continue
+            if usage is not None and self.tokens is not None:
+                actual = usage(result)
+                if actual:
+                    with self._cond:
+                        self.tokens.adjust(actual - tokens)
+            return result
+
+    def _backoff(self, attempt, error):
+        """Seconds to wait before the next attempt, or None when the server asks for too long"""
+        retry_after = self.get_retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                logger.warning("Not retrying: Retry-After of %.0fs exceeds %.0fs", retry_after, self.max_delay)
+                return None
+            with self._cond:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _wait_time(self, tokens):
+        wait = self._paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def _acquire(self, session, tokens):
+        ticket = object()
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            while True:
+                # The next ticket is the head of the first session in rotation
+                head_session, queue = next(iter(self._queues.items()))
+                if queue[0] is ticket:
+                    wait = self._wait_time(tokens)
+                    if wait <= 0:
+                        queue.popleft()
+                        if queue:
+                            self._queues.move_to_end(head_session)
+                        else:
+                            del self._queues[head_session]
+                        if self.requests is not None:
+                            self.requests.take(1)
+                        if self.tokens is not None and tokens:
+                            self.tokens.take(tokens)
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+
+def build_scheduler(is_retryable=None, get_retry_after=None):
+    """Scheduler configured from ``RATE_LIMIT_*`` / ``RETRY_*`` (0 disables a budget)"""
+    return RequestScheduler(
+        requests_per_minute=int(getenv("RATE_LIMIT_RPM", "0")),
+        tokens_per_minute=int(getenv("RATE_LIMIT_TPM", "0")),
+        max_retries=int(getenv("RETRY_MAX_ATTEMPTS", "4")),
+        base_delay=float(getenv("RETRY_BASE_DELAY", "1")),
+        max_delay=float(getenv("RETRY_MAX_DELAY", "30")),
+        is_retryable=is_retryable,
+        get_retry_after=get_retry_after,
+    )
@@ -0,0 +1,96 @@
+import json
+import re
+
+OVERALL_SCORE_PATTERN = re.compile(r'Overall Score:\s*(\d{1,3})/100', re.IGNORECASE)
+# "overall_score" is the first key of a structured ATS result; the trailing
+# delimiter keeps a partially streamed number from matching early
+JSON_OVERALL_SCORE_PATTERN = re.compile(r'"overall_score"\s*:\s*(\d{1,3})\s*[,}\n]')
+
+# (key, label, maximum points) of the ATS rubric, in display order
+ATS_CRITERIA = [
+    ('skills_match', 'Skills Match', 30),
+    ('experience_relevance', 'Experience Relevance', 30),
+    ('education', 'Education & Qualifications', 15),
+    ('keyword_usage', 'Keyword Usage', 15),
+    ('overall_fit', 'Overall Fit', 10),
+]
+ATS_LIST_SECTIONS = [
+    ('critical_issues', '⚠️ Critical Issues Found'),
+    ('improvement_suggestions', '💡 Improvement Suggestions'),
+    ('missing_keywords', '🔍 Missing Keywords/Skills'),
+]
+
+def _bounded_int(value, maximum):
+    try:
+        return max(0, min(maximum, int(round(float(value)))))
+    except (TypeError, ValueError):
+        raise ValueError(f"expected a number, got {value!r}")
+
+def parse_ats_result(text):
+    """Parse and validate a structured ATS result, raising ValueError when malformed"""
+    text = text.strip()
+    if text.startswith("```"):
+        # Some models wrap JSON mode output in a code fence anyway
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict) or 'overall_score' not in data:
+        raise ValueError("missing overall_score")
+
+    breakdown = data.get('breakdown')
+    if not isinstance(breakdown, dict):
+        raise ValueError("missing breakdown")
+    result = {'overall_score': _bounded_int(data['overall_score'], 100), 'breakdown': {}}
+    for key, _, maximum in ATS_CRITERIA:
+        item = breakdown.get(key)
+        if not isinstance(item, dict):
+            item = {'score': item}
+        if item.get('score') is None:
+            raise ValueError(f"missing breakdown score for {key}")
+        result['breakdown'][key] = {
+            'score': _bounded_int(item['score'], maximum),
+            'assessment': str(item.get('assessment') or '').strip()
+        }
+    for key, _ in ATS_LIST_SECTIONS:
+        items = data.get(key) if isinstance(data.get(key), list) else []
+        result[key] = [str(item).strip() for item in items if str(item).strip()]
+    return result
+
+def render_ats_header(score):
+    return f"# 🎯 ATS Compatibility Analysis\n\n## Overall Score: {score}/100\n\n"
+
+def render_ats_markdown(data):
+    """Render a parsed ATS result in the analysis page's markdown layout"""
+    lines = [render_ats_header(data['overall_score']) + "### 📊 Detailed Breakdown:"]
+    for key, label, maximum in ATS_CRITERIA:
+        item = data['breakdown'][key]
+        assessment = f" - {item['assessment']}" if item['assessment'] else ""
+        lines.append(f"**{label}:** {item['score']}/{maximum}{assessment}")
+    for key, title in ATS_LIST_SECTIONS:
+        lines.append(f"### {title}\n" + "\n".join(f"- {item}" for item in data[key] or ["None identified"]))
+    return "\n\n".join(lines) + "\n"
+
+
+def watch_overall_score(chunks, on_score):
+    """Pass streamed chunks through, reporting the overall score as soon as it arrives"""
+    buffer = ""
+    for chunk in chunks:
+        yield chunk
+        if on_score is None:
+            continue
+        buffer += chunk
+        match = OVERALL_SCORE_PATTERN.search(buffer)
+        if match:
+            on_score(max(0, min(100, int(match.group(1)))))
+            on_score = None
+
+def extract_job_title(job_description):
+    """Extract job title from job description"""
+    lines = job_description.split('\n')
+    for line in lines[:5]:
+        line = line.strip()
+        if line and len(line) < 100 and any(word in line.lower() for word in ['engineer', 'developer', 'analyst', 'manager', 'specialist']):
+            return line
+    return "Analyzed Position"
@@ -0,0 +1,84 @@
+"""Measure the import cost of each Streamlit page in a fresh interpreter
+
+Run from the project root::
+
+    python -m utils.startup_profile --budget-ms 1500
+
+Every page's top-level imports are executed in a new ``python -X importtime``
+process, so the numbers match what a freshly scaled-up worker pays. The exit
+status is non-zero when any page exceeds the budget.
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+
+
+def page_imports(path):
+    """Return the top-level import statements of a page as source lines"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def profile_imports(statements, cwd):
+    """Run ``statements`` under -X importtime, returning {module: cumulative_us} for top-level imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented; only count what the page pulls in directly
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500, help="maximum import time per page")
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per page")
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pages = [os.path.join(root, "app.py")] + sorted(glob.glob(os.path.join(root, "pages", "*.py")))
+
+    # Modules the bare interpreter imports at startup are not the page's cost
+    baseline = set(profile_imports(["pass"], root))
+
+    over_budget = False
+    for path in pages:
+        name = os.path.relpath(path, root)
+        try:
+            modules = profile_imports(page_imports(path), root)
+            modules = {module: cost for module, cost in modules.items() if module not in baseline}
+        except RuntimeError as e:
+            print(f"{name:<32} ERROR  {e}")
+            over_budget = True
+            continue
+
+        total_ms = sum(modules.values()) / 1000
+        status = "OK" if total_ms <= args.budget_ms else "OVER"
+        over_budget = over_budget or status == "OVER"
+        print(f"{name:<32} {total_ms:8.1f} ms  {status}")
+        heaviest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for module, cumulative in heaviest:
+            print(f"    {module:<40} {cumulative / 1000:8.1f} ms")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import functools
+import logging
+import re
+from utils.config import getenv
+
+logger = logging.getLogger(__name__)
+
+# Job post sections worth keeping under a budget, and sections that rarely
+# matter for matching a resume; priority wins when a heading matches both
+_PRIORITY_HEADING = re.compile(
+    r"require|qualification|skill|must.have|nice.to.have|preferred|experience|responsibilit"
+    r"|what you.ll do|what you will do|duties|the role|your role|tech(nology)? stack|you have|you bring|about you"
+    r"|looking for|ideal candidate|who you are",
+    re.IGNORECASE
+)
+# Phrases like "who we are" also start requirement headings ("Who we are
+# looking for"), so company sections only match as the whole heading
+_BOILERPLATE_HEADING = re.compile(
+    r"benefit|perks|what we offer|we offer|compensation|salary|pay range|equal (employment )?opportunit|\beeo\b"
+    r"|diversity|inclusion|accommodation|privacy|how to apply|application process|disclaimer"
+    r"|^(about (us|the company)|who we are|our (culture|values|mission))\W*$",
+    re.IGNORECASE
+)
+# Legal lines that often appear without a heading of their own
+_BOILERPLATE_LINE = re.compile(
+    r"equal opportunity employer|without regard to|reasonable accommodation|protected veteran"
+    r"|protected (characteristic|status)|e-verify",
+    re.IGNORECASE
+)
+_BULLET = re.compile(r"^[\s\-*•·▪–>#]+")
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's encoding when the package (and its data) is available, else None"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(getenv("TOKENIZER_ENCODING", "cl100k_base"))
+    except Exception as e:
+        logger.debug("tiktoken unavailable, estimating tokens from length: %s", e)
+        return None
+
+
+def count_tokens(text):
+    """Count tokens with tiktoken, or estimate about four characters per token"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _normalize(line):
+    return " ".join(_BULLET.sub("", line).casefold().split())
+
+
+def _is_heading(line):
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60 or len(stripped.split()) > 8 or stripped[0] in "-*•·▪–>":
+        return False
+    if stripped.startswith("#") or stripped.endswith(":") or (stripped.isupper() and len(stripped) > 3):
+        return True
+    # Bare headings such as "Benefits" or "What you'll do"
+    return len(stripped.split()) <= 5 and not stripped.endswith((".", ",", ";")) and bool(
+        _PRIORITY_HEADING.search(stripped) or _BOILERPLATE_HEADING.search(stripped)
+    )
+
+
+def _dedupe(lines, consecutive_only=False):
+    """Indices of the lines to keep: first occurrences, and no runs of blank lines
+
+    With ``consecutive_only`` a line is only dropped when it repeats the
+    previous non-blank line.
+    """
+    seen = set()
+    keep = []
+    blank = True
+    for i, line in enumerate(lines):
+        key = _normalize(line)
+        if not key:
+            if not blank:
+                keep.append(i)
+            blank = True
+            continue
+        if key in seen:
+            continue
+        if consecutive_only:
+            seen.clear()
+        seen.add(key)
+        keep.append(i)
+        blank = False
+    while keep and not lines[keep[-1]].strip():
+        keep.pop()
+    return keep
+
+
+def _fit(lines, ranks, budget):
+    """Drop the lowest ranked lines, last first, until the text fits ``budget`` tokens"""
+    costs = [count_tokens(line) + 1 for line in lines]
+    total = sum(costs)
+    keep = [True] * len(lines)
+    order = sorted(range(len(lines)), key=lambda i: (-ranks[i], -i))
+    for i in order:
+        if total <= budget:
+            break
+        keep[i] = False
+        total -= costs[i]
+    return [line for line, kept in zip(lines, keep) if kept]
+
+
+def compact_job_description(text, budget=0):
+    """Strip boilerplate and duplicates from a job post and fit it to ``budget`` tokens
+
+    Benefits, EEO and company sections are removed. Under budget pressure
+    unclassified sections go first, then the introduction, and the
+    requirements, skills and responsibilities sections last. A budget of 0
+    only cleans the text.
+    """
+    lines = []
+    ranks = []
+    rank = 1  # text before the first heading: title and summary
+    skipping = False
+    for line in text.splitlines():
+        if _is_heading(line):
+            heading = _normalize(line)
+            skipping = not _PRIORITY_HEADING.search(heading) and bool(_BOILERPLATE_HEADING.search(heading))
+            rank = 0 if _PRIORITY_HEADING.search(heading) else 2
+        if skipping or _BOILERPLATE_LINE.search(line):
+            continue
+        lines.append(line)
+        ranks.append(rank)
+
+    keep = _dedupe(lines)
+    lines = [lines[i].rstrip() for i in keep]
+    text = "\n".join(lines)
+    if budget <= 0 or count_tokens(text) <= budget:
+        return text
+
+    lines = _fit(lines, [ranks[i] for i in keep], budget)
+    # Headings whose content did not fit
+    while lines and (not lines[-1].strip() or _is_heading(lines[-1])):
+        lines.pop()
+    # A budget too small for any line still keeps the start of the post
+    return "\n".join(lines) or text[:budget * 4]
+
+
+def compact_resume(text, budget=0):
+    """Drop blank runs and back-to-back repeated lines and fit the resume to ``budget`` tokens, keeping its start
+
+    Lines repeated further apart are kept, since resumes legitimately
+    repeat titles and skills across positions.
+    """
+    lines = text.splitlines()
+    lines = [lines[i].rstrip() for i in _dedupe(lines, consecutive_only=True)]
+    text = "\n".join(lines)
+    if budget <= 0 or count_tokens(text) <= budget:
+        return text
+    return "\n".join(_fit(lines, [0] * len(lines), budget))